@@ -0,0 +1,127 @@
+"""Microbenchmark of the per-call overhead added by the bhom_analytics decorator.
+
+Run directly:
+    python benchmarks/analytics_overhead.py [n_calls]
+
+Calls are timed in rounds that fit in the analytics writer queue. The writer is held
+back while a round runs and flushed afterwards, so the cost paid on the caller's thread
+and the cost of serialising and writing entries on the writer thread are reported
+separately. Entries are written to a temporary folder rather than the BHoM logs.
+
+For comparison, the original decorator is timed too: it inspected the function's
+signature, serialised the entry and wrote it to the log synchronously on every call.
+"""
+
+import inspect
+import json
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+# pylint: disable=C0413
+from python_toolkit.bhom import analytics
+from python_toolkit.bhom import get_bhom_version
+from python_toolkit.bhom.analytics import bhom_analytics, convert_exc_info_to_bhom_error, get_project_number
+from python_toolkit.bhom.logging import ANALYTICS_LOGGER, ANALYTICS_WRITER
+from python_toolkit.bhom.util import bson_unix_ticks
+# pylint: enable=C0413
+
+ROUND_SIZE = 5000
+
+
+def _add(a: float, b: float) -> float:
+    return a + b
+
+
+def _original_bhom_analytics(function):
+    """The decorator as it was before entries were queued, doing all of its work per call."""
+    component_id = uuid.uuid4()
+    bhom_version = get_bhom_version()
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        pid = get_project_number()
+        file_id = uuid.uuid3(uuid.NAMESPACE_OID, "" if pid is None else pid)
+
+        argspec = inspect.getfullargspec(function)[-1]
+        argspec.pop("return", None)
+        parameters = [f'{{"_t": "{argspec[k]}", "Name": "{k}"}}' for k in argspec.keys()]
+
+        exec_metadata = {
+            "BHoMVersion": bhom_version,
+            "BHoM_Guid": uuid.uuid4(),
+            "CallerName": function.__name__,
+            "ComponentId": component_id,
+            "CustomData": {"interpreter": sys.executable},
+            "Errors": [],
+            "FileId": str(file_id),
+            "FileName": str(file_id),
+            "Fragments": [],
+            "Name": "",
+            "ProjectID": get_project_number(),
+            "SelectedItem": {
+                "MethodName": function.__name__,
+                "Parameters": parameters,
+                "TypeName": f"{function.__module__}.{function.__qualname__}",
+            },
+            "Time": {"$date": bson_unix_ticks(short=True)},
+            "UI": "Python",
+            "UiVersion": sys.version,
+            "_t": "BH.oM.Base.UsageLogEntry",
+        }
+
+        try:
+            return function(*args, **kwargs)
+        except Exception:
+            exec_metadata["Errors"].extend(convert_exc_info_to_bhom_error(sys.exc_info()))
+            raise
+        finally:
+            log_file = analytics.BHOM_LOG_FOLDER / f"Usage_{function.__module__.split('.')[0]}_{datetime.now().strftime('%Y%m%d')}.log"
+            if ANALYTICS_LOGGER.handlers[0].baseFilename != str(log_file):
+                ANALYTICS_LOGGER.handlers[0].close()
+                ANALYTICS_LOGGER.handlers[0].baseFilename = str(log_file)
+            ANALYTICS_LOGGER.info(json.dumps(exec_metadata, default=str, indent=None))
+
+    return wrapper
+
+
+def _time_per_call(func, n_calls: int) -> tuple[float, float]:
+    n_rounds = max(1, n_calls // ROUND_SIZE)
+    caller, writer = 0, 0
+    for _ in range(n_rounds):
+        start = time.perf_counter_ns()
+        for i in range(ROUND_SIZE):
+            func(i, 1.0)
+        caller += time.perf_counter_ns() - start
+
+        start = time.perf_counter_ns()
+        ANALYTICS_WRITER.flush()
+        writer += time.perf_counter_ns() - start
+    return caller / (n_rounds * ROUND_SIZE), writer / (n_rounds * ROUND_SIZE)
+
+
+def main(n_calls: int = 200_000) -> None:
+    analytics.BHOM_LOG_FOLDER = Path(tempfile.mkdtemp())
+    ANALYTICS_WRITER.batch_size = ANALYTICS_WRITER.max_queue_size = ROUND_SIZE + 1
+    ANALYTICS_WRITER.flush_interval = 3600
+
+    baseline, _ = _time_per_call(_add, n_calls)
+    original, _ = _time_per_call(_original_bhom_analytics(_add), n_calls)
+    decorated, written = _time_per_call(bhom_analytics()(_add), n_calls)
+
+    print(f"undecorated:           {baseline:8.0f} ns/call")
+    print(f"before (synchronous):  {original:8.0f} ns/call")
+    print(f"bhom_analytics:        {decorated:8.0f} ns/call")
+    print(f"overhead before:       {original - baseline:8.0f} ns/call")
+    print(f"caller thread overhead:{decorated - baseline:8.0f} ns/call")
+    print(f"writer thread cost:    {written:8.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,90 @@
+"""Benchmark of summarise_usage_logs over a large number of synthetic usage entries.
+
+Run directly:
+    python benchmarks/summarise_usage_logs.py [n_entries] [n_legacy_entries]
+
+Entries are generated lazily and streamed into summarise_usage_logs, so memory use does
+not grow with n_entries. The previous sort-and-groupby implementation needs a list in
+memory, so it is timed on a smaller number of entries for comparison.
+"""
+
+import itertools
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+# pylint: disable=C0413
+from python_toolkit.bhom.analytics import UsageLogEntry, summarise_usage_logs
+from python_toolkit.bhom.util import bson_unix_ticks_to_datetime
+# pylint: enable=C0413
+
+N_PROJECTS = 50
+N_METHODS = 40
+N_COMPONENTS = 200
+
+
+def _entries(n_entries: int, seed: int = 0):
+    rng = random.Random(seed)
+    projects = [(f"project_{i}", f"file_{i}") for i in range(N_PROJECTS)]
+    methods = [
+        (f"method_{i}", {"MethodName": f"method_{i}", "Parameters": ['{"_t": "<class \'float\'>", "Name": "a"}'], "TypeName": f"module.method_{i}"})
+        for i in range(N_METHODS)
+    ]
+    components = [f"component_{i}" for i in range(N_COMPONENTS)]
+
+    for i in range(n_entries):
+        project_id, file_id = projects[rng.randrange(N_PROJECTS)]
+        caller_name, selected_item = methods[rng.randrange(N_METHODS)]
+        yield UsageLogEntry(
+            "8.0", f"guid_{i}", caller_name, components[rng.randrange(N_COMPONENTS)], {}, [],
+            file_id, file_id, [], "", project_id, selected_item, {"$date": 1_700_000_000_000 + i}, "Python", "3.10",
+        )
+
+
+def _legacy_summarise(usage_log_entries):
+    """The sort-and-groupby implementation that summarise_usage_logs replaced."""
+    db_entries = []
+    usage_log_entries.sort(key=lambda x: x.ProjectID)
+    for file_id, filegroup in itertools.groupby(usage_log_entries, lambda x: x.FileId):
+        filegroup = list(filegroup)
+        filegroup.sort(key=lambda x: x.CallerName + str(x.SelectedItem))
+        for _, methodgroup in itertools.groupby(filegroup, lambda x: x.CallerName + str(x.SelectedItem)):
+            methodgroup = list(methodgroup)
+            db_entries.append({
+                "StartTime": bson_unix_ticks_to_datetime(min(methodgroup, key=lambda x: x.Time["$date"]).Time["$date"], short=True),
+                "EndTime": bson_unix_ticks_to_datetime(max(methodgroup, key=lambda x: x.Time["$date"]).Time["$date"], short=True),
+                "FileId": file_id,
+                "NbCallingComponents": len(set(a.ComponentId for a in methodgroup)),
+                "TotalNbCals": len(methodgroup),
+                "Errors": list(itertools.chain.from_iterable(x.Errors for x in methodgroup)),
+            })
+    return db_entries
+
+
+def _time(label: str, func, n_entries: int) -> None:
+    start = time.perf_counter()
+    n_summaries = len(func())
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{n_entries:>12,} entries {elapsed:8.2f} s {elapsed / n_entries * 1e9:8.0f} ns/entry ({n_summaries} summaries)")
+
+
+def main(n_entries: int = 10_000_000, n_legacy_entries: int = 1_000_000) -> None:
+    start = time.perf_counter()
+    for _ in _entries(n_legacy_entries):
+        pass
+    generation = (time.perf_counter() - start) / n_legacy_entries
+    print(f"generating entries costs {generation * 1e9:.0f} ns/entry, which is included in the stream timing")
+
+    legacy = list(_entries(n_legacy_entries))
+    _time("sort and groupby (list)", lambda: _legacy_summarise(legacy), n_legacy_entries)
+    _time("summarise_usage_logs (list)", lambda: summarise_usage_logs(legacy), n_legacy_entries)
+    del legacy
+
+    _time("summarise_usage_logs (stream)", lambda: summarise_usage_logs(_entries(n_entries)), n_entries)
+
+
+if __name__ == "__main__":
+    main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,80 @@
+"""Benchmark of the memory held by usage log entries loaded from file.
+
+Run directly:
+    python benchmarks/usage_log_memory.py [n_entries]
+
+A log of synthetic entries, in the format written by bhom_analytics, is written to a temporary
+folder and loaded both as a list of UsageLogEntry objects and as a single UsageLogBatch. The
+memory still allocated once loading has finished is measured with tracemalloc.
+"""
+
+import gc
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+# pylint: disable=C0413
+from python_toolkit.bhom.analytics import UsageLogBatch, UsageLogReader
+# pylint: enable=C0413
+
+N_PROJECTS = 50
+N_METHODS = 40
+
+
+def _write_log(path: Path, n_entries: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    methods = [
+        (f"method_{i}", str(uuid.uuid4()), {"MethodName": f"method_{i}", "Parameters": ['{"_t": "<class \'float\'>", "Name": "a"}'], "TypeName": f"module.method_{i}"})
+        for i in range(N_METHODS)
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n_entries):
+            caller_name, component_id, selected_item = methods[rng.randrange(N_METHODS)]
+            project_id = f"project_{rng.randrange(N_PROJECTS)}"
+            file_id = str(uuid.uuid3(uuid.NAMESPACE_OID, project_id))
+            f.write(json.dumps({
+                "BHoMVersion": "8.0.0", "BHoM_Guid": str(uuid.uuid4()), "CallerName": caller_name, "ComponentId": component_id,
+                "CustomData": {"interpreter": sys.executable, "WallTimeNs": rng.randrange(10**7), "CpuTimeNs": rng.randrange(10**7)},
+                "Errors": [], "FileId": file_id, "FileName": file_id, "Fragments": [], "Name": "", "ProjectID": project_id,
+                "SelectedItem": selected_item, "Time": {"$date": 1_700_000_000_000 + i}, "UI": "Python", "UiVersion": sys.version,
+                "_t": "BH.oM.Base.UsageLogEntry",
+            }) + "\n")
+
+
+def _measure(label: str, load, n_entries: int) -> None:
+    start = time.perf_counter()
+    loaded = load()
+    elapsed = time.perf_counter() - start
+    del loaded
+
+    # tracing slows allocation down, so memory is measured on a second, untimed, load
+    gc.collect()
+    tracemalloc.start()
+    loaded = load()
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<24}{n_entries:>10,} entries {elapsed:8.2f} s {held / n_entries:8.0f} bytes/entry")
+    del loaded
+
+
+def main(n_entries: int = 200_000) -> None:
+    log_file = Path(tempfile.mkdtemp()) / "Usage_Benchmark_20240101.log"
+    _write_log(log_file, n_entries)
+
+    _measure("list of UsageLogEntry", lambda: list(UsageLogReader(log_file)), n_entries)
+    _measure("UsageLogBatch", lambda: UsageLogReader(log_file).read_batch(), n_entries)
+
+    batch = UsageLogReader(log_file).read_batch()
+    assert isinstance(batch, UsageLogBatch) and len(batch) == n_entries
+
+
+if __name__ == "__main__":
+    main(*[int(i) for i in sys.argv[1:]])
@@ -1,11 +1,10 @@
 """Base module for the python_toolkit package."""
 # pylint: disable=E0401
 import getpass
+import importlib
 import os
 from pathlib import Path
 
-import matplotlib.pyplot as plt
-
 # pylint: disable=E0401
 
 # get common paths
@@ -18,3 +17,27 @@ TOOLKIT_NAME = "Python_Toolkit"
 if os.name == "nt":
     # override "HOME" in case this is set to something other than default for windows
     os.environ["HOME"] = (Path("C:/Users/") / getpass.getuser()).as_posix()
+
+# subpackages (and matplotlib.pyplot, previously imported here as plt) are imported on first
+# access, so that "import python_toolkit" stays cheap for short lived interpreters
+_LAZY_MODULES = {
+    "bhom": ".bhom",
+    "bhom_tkinter": ".bhom_tkinter",
+    "helpers": ".helpers",
+    "plot": ".plot",
+    "plt": "matplotlib.pyplot",
+}
+
+__all__ = ["DATA_DIRECTORY", "BHOM_DIRECTORY", "HOME_DIRECTORY", "TOOLKIT_NAME", *_LAZY_MODULES]
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_LAZY_MODULES[name], __name__)
+    globals()[name] = module
+    return module
+
+
+def __dir__():
+    return sorted(set(globals()).union(_LAZY_MODULES))
@@ -4,11 +4,25 @@ import os
 from pathlib import Path  # pylint: disable=E0401
 from os import path
 import tempfile
-import importlib.metadata
+from functools import lru_cache
 
 BHOM_LOG_FOLDER = Path(path.expandvars("%PROGRAMDATA%/BHoM/Logs"))
 TOOLKIT_NAME = "Python_Toolkit"
-BHOM_VERSION = importlib.metadata.version("python_toolkit")
+
+
+@lru_cache(maxsize=None)
+def get_bhom_version() -> str:
+    """Get the installed version of python_toolkit, looked up on first use rather than at import."""
+    import importlib.metadata  # pylint: disable=import-outside-toplevel
+    return importlib.metadata.version("python_toolkit")
+
+
+def __getattr__(name: str):
+    # BHOM_VERSION is still available as an attribute, without the lookup cost at import
+    if name == "BHOM_VERSION":
+        return get_bhom_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 #Environment variable that if set disables BHoM analytics logging.
 DISABLE_ANALYTICS = os.environ.get("DISABLE_BHOM_ANALYTICS", None)
@@ -17,6 +31,12 @@ if DISABLE_ANALYTICS is None:
 else:
     DISABLE_ANALYTICS = True
 
+#Environment variable that if set records the peak memory allocated during decorated calls.
+TRACE_MEMORY = os.environ.get("BHOM_ANALYTICS_TRACE_MEMORY", None) is not None
+
+#Environment variable that if set profiles decorated calls with cProfile, see python_toolkit.bhom.profiling.
+PROFILE_FUNCTIONS = os.environ.get("BHOM_ANALYTICS_PROFILE", None)
+
+# the folder is created when the first log is written, rather than at import
 if not BHOM_LOG_FOLDER.exists():
     BHOM_LOG_FOLDER = Path(tempfile.gettempdir()) / "BHoM" / "Logs"
-    BHOM_LOG_FOLDER.mkdir(exist_ok=True, parents=True)
\ No newline at end of file
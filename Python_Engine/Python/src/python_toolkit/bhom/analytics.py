@@ -1,106 +1,1003 @@
 """BHoM analytics decorator."""
 # pylint: disable=E0401
+import atexit
 import codecs
+from collections import deque
 from dataclasses import dataclass, field
+import hashlib
 import inspect
-from itertools import groupby
 import itertools
 import json
+import math
+import operator
 import os
 from pathlib import Path
+import random
+import re
 import socket
 import sys
+import threading
 import traceback
 import uuid
-from functools import wraps
-from typing import Any, Callable, Dict, List, Union
-from datetime import datetime
+import time
+import tracemalloc
+from functools import lru_cache, wraps
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, Iterable, Iterator, List, Tuple, Union
+from datetime import datetime, timedelta
 
 # pylint: enable=E0401
 
-from .logging import ANALYTICS_LOGGER, CONSOLE_LOGGER
-from .util import bson_unix_ticks, bson_unix_ticks_to_datetime
-from . import BHOM_VERSION, TOOLKIT_NAME, BHOM_LOG_FOLDER, DISABLE_ANALYTICS
+from .logging import ANALYTICS_WRITER, CONSOLE_LOGGER
+from .logging.file import open_log_file
+from .logging.writer import WRITER_EXIT_PRIORITY, run_at_child_exit
+from .profiling import PROFILER
+from .tracing import CURRENT_SPAN, TRACER
+from .util import bson_unix_ticks, bson_unix_ticks_array, bson_unix_ticks_to_datetime, bson_unix_ticks_to_datetime_array
+from . import BHOM_LOG_FOLDER, DISABLE_ANALYTICS, TRACE_MEMORY, get_bhom_version
 
-@dataclass
+if TYPE_CHECKING:
+    # numpy is imported by the functions that use it, as it is slow to import
+    import numpy as np
+
+# the fields of a usage entry, in the order they are passed to UsageLogEntry
+_ENTRY_FIELDS = (
+    "BHoMVersion", "BHoM_Guid", "CallerName", "ComponentId", "CustomData", "Errors", "FileId",
+    "FileName", "Fragments", "Name", "ProjectID", "SelectedItem", "Time", "UI", "UiVersion",
+)
+_entry_values = operator.itemgetter(*_ENTRY_FIELDS)
+
+# string fields that repeat between entries, interned when decoding so that each distinct
+# value is held in memory once rather than once per entry
+_INTERNED_FIELDS = tuple(
+    _ENTRY_FIELDS.index(i) for i in ("BHoMVersion", "CallerName", "ComponentId", "FileId", "FileName", "Name", "ProjectID", "UI", "UiVersion")
+)
+_SELECTED_ITEM = _ENTRY_FIELDS.index("SelectedItem")
+_required_values = operator.itemgetter(*(i for i in _ENTRY_FIELDS if i not in ("CustomData", "Fragments")))
+
+@dataclass(slots=True)
 class UsageLogEntry():
-    BHoMVersion:str = BHOM_VERSION
-    BHoM_Guid:uuid.UUID = uuid.uuid4()
+    BHoMVersion:str = field(default_factory = get_bhom_version)
+    BHoM_Guid:uuid.UUID = field(default_factory = uuid.uuid4)
     CallerName:str = ""
-    ComponentId:uuid.UUID = uuid.uuid4()
-    CustomData:Dict = field(default_factory = {"interpreter", sys.executable})
-    Errors:List[str] = field(default_factory = [])
+    ComponentId:uuid.UUID = field(default_factory = uuid.uuid4)
+    CustomData:Dict = field(default_factory = lambda: {"interpreter": sys.executable})
+    Errors:List[str] = field(default_factory = list)
     FileId:str = ""
     FileName:str = ""
-    Fragments:List[str] = field(default_factory = [])
+    Fragments:List[str] = field(default_factory = list)
     Name:str = ""
     ProjectID:str = ""
-    SelectedItem:Dict = field(default_factory = {"MethodName": "", "Parameters": [], "TypeName": ""})
-    Time:Dict = field(default_factory = {"$date": 0})
+    SelectedItem:Dict = field(default_factory = lambda: {"MethodName": "", "Parameters": [], "TypeName": ""})
+    Time:Dict = field(default_factory = lambda: {"$date": 0})
     UI:str = "Python"
     UiVersion:str = sys.version
     _t:str = "BH.oM.Base.UsageLogEntry"
 
     @classmethod
     def from_json(cls, json_str:str) -> 'UsageLogEntry':
-        d = json.loads(json_str)
-        if "CustomData" not in d:
-            d["CustomData"] = None
-        if "Fragments" not in d:
-            d["Fragments"] = None
-        return UsageLogEntry(d["BHoMVersion"], d["BHoM_Guid"], d["CallerName"], d["ComponentId"], d["CustomData"], d["Errors"], d["FileId"], d["FileName"], d["Fragments"], d["Name"], d["ProjectID"], d["SelectedItem"], d["Time"], d["UI"], d["UiVersion"])
+        return cls.from_dict(json.loads(json_str))
+
+    @classmethod
+    def from_dict(cls, d:Dict, shared:Dict = None) -> 'UsageLogEntry':
+        """Create an entry from a decoded usage log line.
+
+        Args:
+            d (Dict):
+                The decoded line.
+            shared (Dict, optional):
+                A memo used to share identical SelectedItem values between the entries created
+                with it, for example the entries of one chunk of a log. Defaults to None.
+
+        Returns:
+            UsageLogEntry:
+                The entry.
+        """
+        try:
+            values = list(_entry_values(d))
+        except KeyError:
+            # entries written before CustomData and Fragments were recorded
+            d.setdefault("CustomData", None)
+            d.setdefault("Fragments", None)
+            values = list(_entry_values(d))
+
+        for i in _INTERNED_FIELDS:
+            if type(values[i]) is str:  # pylint: disable=unidiomatic-typecheck
+                values[i] = sys.intern(values[i])
+
+        if shared is not None:
+            selected = values[_SELECTED_ITEM]
+            try:
+                values[_SELECTED_ITEM] = shared.setdefault(
+                    (selected["MethodName"], selected["TypeName"], tuple(selected["Parameters"])), selected
+                )
+            except (KeyError, TypeError):
+                pass
+
+        return cls(*values)
+
+# a usage log, or one of its rotated backups (".1", ".2" and so on), which may be compressed
+_LOG_SUFFIX_PATTERN = re.compile(r"\.log(?:\.(?P<rotation>\d+))?(?:\.gz|\.xz)?$")
+
+def _log_order(path: Path) -> Tuple:
+    """Sort rotated backups of a log before the log itself, oldest (highest numbered) first."""
+    match = _LOG_SUFFIX_PATTERN.search(path.name)
+    if match is None:
+        return (str(path), 0)
+    return (str(path)[:len(str(path)) - len(match[0])], -int(match["rotation"] or 0))
+
+def _usage_logs(folder: Path, pattern: str = "Usage_*.log") -> List[Path]:
+    """Find the usage logs in a folder, including their rotated, possibly compressed, backups."""
+    logs = [i for i in folder.glob(pattern + "*") if _LOG_SUFFIX_PATTERN.search(i.name)]
+    return sorted(logs, key=_log_order)
+
+_GLOB_CHARACTERS = re.compile(r"[*?[]")
+
+def _resolve_log_files(source: Union[str, Path, Iterable[Union[str, Path]], None]) -> List[Path]:
+    """Expand a log file, directory, glob pattern (relative to BHOM_LOG_FOLDER unless absolute) or a
+    collection of these into a sorted list of log files. Directories include rotated backups.
+    Raises FileNotFoundError for a path without wildcards that is neither a file nor a directory."""
+    if source is None:
+        return _usage_logs(BHOM_LOG_FOLDER)
+
+    if not isinstance(source, (str, Path)):
+        return list(itertools.chain.from_iterable(_resolve_log_files(i) for i in source))
+
+    path = Path(source)
+    if not path.is_absolute() and not path.exists() and (BHOM_LOG_FOLDER / path).exists():
+        path = BHOM_LOG_FOLDER / path
+    if path.is_file():
+        return [path]
+    if path.is_dir():
+        return _usage_logs(path)
+    if not _GLOB_CHARACTERS.search(str(path)):
+        raise FileNotFoundError(f"No such usage log file or directory: '{source}'")
+    if path.is_absolute():
+        return sorted(Path(path.anchor).glob(str(path.relative_to(path.anchor))))
+    return sorted(BHOM_LOG_FOLDER.glob(str(path)))
+
+def parse_log_lines(lines: List[str]) -> Tuple[List[UsageLogEntry], int]:
+    """Parse a chunk of usage log lines, skipping any that are malformed.
+
+    Args:
+        lines (List[str]):
+            The lines, each a JSON encoded usage entry. Blank lines are ignored.
+
+    Returns:
+        Tuple[List[UsageLogEntry], int]:
+            The entries, and the number of malformed lines skipped.
+    """
+    entries: List[UsageLogEntry] = []
+    skipped = 0
+    shared = {}
+    for line in lines:
+        if line.isspace() or len(line) == 0:
+            continue
+        try:
+            entries.append(UsageLogEntry.from_dict(json.loads(line), shared))
+        except (ValueError, KeyError, TypeError):
+            skipped += 1
+    return entries, skipped
+
+def _encoding_key(value: Any) -> Any:
+    """A hashable key identifying a value of a usage entry field, for dictionary encoding."""
+    if value is None or isinstance(value, str):
+        return value
+    if not value:
+        return (type(value).__name__,)
+    if isinstance(value, dict):
+        # the common case of a flat dict, such as SelectedItem, without serialising it
+        key = ("dict",) + tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in value.items())
+        try:
+            hash(key)
+            return key
+        except TypeError:
+            pass
+    return ("json", json.dumps(value, sort_keys=True, default=str))
+
+def _dictionary_encode(column: List, lookup: Dict, values: List) -> "np.ndarray":
+    """Encode a column as codes indexing `values`, adding any values not yet in `lookup`."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    codes = []
+    for value in column:
+        key = value if value is None or value.__class__ is str else _encoding_key(value)
+        code = lookup.get(key)
+        if code is None:
+            code = lookup[key] = len(values)
+            values.append(value)
+        codes.append(code)
+    return np.array(codes, dtype=np.int32)
+
+def _split_measures(custom_data: List[Union[Dict, None]]) -> Tuple[Dict[str, "np.ndarray"], List[Union[Dict, None]]]:
+    """Split the measures (see UsageLogBatch.MEASURES) out of CustomData, into float64 arrays
+    that are NaN where they were not recorded, returning them and the remaining CustomData."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    measures = {
+        measure: np.array([math.nan if not i or i.get(measure) is None else i[measure] for i in custom_data], dtype=np.float64)
+        for measure in UsageLogBatch.MEASURES
+    }
+    custom_data = [
+        {k: v for k, v in i.items() if k not in UsageLogBatch.MEASURES} if i and not i.keys().isdisjoint(UsageLogBatch.MEASURES) else i
+        for i in custom_data
+    ]
+    return measures, custom_data
+
+class UsageLogBatch():
+    """Usage entries in columnar form, for holding millions of entries in memory.
+
+    Time is held as an int64 array of BSON unix ticks (short). Every other field is dictionary
+    encoded: `codes[field]` is an int32 array indexing the distinct values of the field, in
+    `values[field]`. The per-call measurements in CustomData (see MEASURES) are split out into
+    float64 arrays in `measures`, NaN where they were not recorded, so that the remaining
+    CustomData repeats between entries and is dictionary encoded too.
+
+    Args:
+        records (Iterable[Dict], optional):
+            Usage entries as dictionaries, for example decoded log lines. Defaults to None.
+    """
+
+    __slots__ = ("Time", "codes", "values", "measures")
+
+    FIELDS = tuple(i for i in _ENTRY_FIELDS if i != "Time")
+    MEASURES = ("WallTimeNs", "CpuTimeNs", "PeakMemoryBytes")
+
+    def __init__(self, records: Iterable[Dict] = None):
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        records = list(records or ())
+        self.Time = np.array([record["Time"]["$date"] for record in records], dtype=np.int64)
+        self.codes: Dict[str, np.ndarray] = {}
+        self.values: Dict[str, List] = {}
+        self.measures: Dict[str, np.ndarray] = {}
+
+        self.measures, custom_data = _split_measures([record.get("CustomData") for record in records])
+
+        for field in self.FIELDS:
+            column = custom_data if field == "CustomData" else [record.get(field) for record in records]
+            self.values[field] = []
+            self.codes[field] = _dictionary_encode(column, {}, self.values[field])
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[UsageLogEntry]) -> 'UsageLogBatch':
+        """Create a batch from UsageLogEntry objects."""
+        return cls({field: getattr(entry, field) for field in _ENTRY_FIELDS} for entry in entries)
+
+    @classmethod
+    def concatenate(cls, batches: Iterable['UsageLogBatch']) -> 'UsageLogBatch':
+        """Combine batches into one, merging the distinct values of each field."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        batches = list(batches)
+        batch = cls()
+        batch.Time = np.concatenate([batch.Time] + [i.Time for i in batches])
+        batch.measures = {
+            measure: np.concatenate([batch.measures[measure]] + [i.measures[measure] for i in batches])
+            for measure in cls.MEASURES
+        }
+
+        for field in cls.FIELDS:
+            lookup, codes = {}, [batch.codes[field]]
+            for other in batches:
+                remap = _dictionary_encode(other.values[field], lookup, batch.values[field])
+                codes.append(remap[other.codes[field]])
+            batch.codes[field] = np.concatenate(codes)
+
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.Time)
+
+    def column(self, name: str) -> "np.ndarray":
+        """Get a field, or a measure, as an array with a value per entry."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        if name == "Time":
+            return self.Time
+        if name in self.measures:
+            return self.measures[name]
+        values = np.empty(len(self.values[name]), dtype=object)
+        values[:] = self.values[name]
+        return values[self.codes[name]]
+
+    def __getitem__(self, index: int) -> UsageLogEntry:
+        """Rebuild the UsageLogEntry at an index."""
+        values = {field: self.values[field][self.codes[field][index]] for field in self.FIELDS}
+        custom_data = values["CustomData"]
+        measures = {measure: int(self.measures[measure][index]) for measure in self.MEASURES if not math.isnan(self.measures[measure][index])}
+        if measures:
+            values["CustomData"] = {**(custom_data or {}), **measures}
+        return UsageLogEntry(Time={"$date": int(self.Time[index])}, **values)
+
+    def __iter__(self) -> Iterator[UsageLogEntry]:
+        for index in range(len(self)):
+            yield self[index]
+
+def _parse_log_batch(lines: List[str]) -> Tuple[UsageLogBatch, int]:
+    """Parse a chunk of log lines into a batch, returning it and the number of malformed lines skipped."""
+    records: List[Dict] = []
+    skipped = 0
+    for line in lines:
+        if line.isspace() or len(line) == 0:
+            continue
+        try:
+            record = json.loads(line)
+            _required_values(record)  # raises KeyError or TypeError if this is not a usage entry
+            records.append(record)
+        except (ValueError, KeyError, TypeError):
+            skipped += 1
+    return UsageLogBatch(records), skipped
+
+class UsageLogReader():
+    """Stream UsageLogEntry objects from one or many usage log files.
+
+    Files are read in chunks of lines, so memory use is bounded by the chunk size rather than
+    the size of the logs. Each file is decoded as UTF-8 with an optional Byte Order Mark, as some
+    files generated by BHoM logs are encoded with a BOM. Malformed lines are skipped and counted
+    in `skipped`. Use batches() or read_batch() to read entries in the compact, columnar form of
+    a UsageLogBatch instead.
+
+    Args:
+        source (Union[str, Path, Iterable[Union[str, Path]]], optional):
+            A log file, a directory of "Usage_*.log" files (and their rotated, possibly
+            compressed, backups such as "Usage_*.log.1.gz"), a glob pattern (relative to
+            BHOM_LOG_FOLDER unless absolute), or a collection of these. Defaults to None, which
+            reads all "Usage_*.log" files in BHOM_LOG_FOLDER.
+        processes (int, optional):
+            The number of worker processes used to parse chunks of lines. Defaults to 1, which
+            parses in the calling process.
+        chunk_size (int, optional):
+            The number of lines read and parsed at a time. Defaults to 10000.
+    """
+
+    def __init__(self, source: Union[str, Path, Iterable[Union[str, Path]]] = None, processes: int = 1, chunk_size: int = 10000):
+        self.files = _resolve_log_files(source)
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.skipped = 0
+
+    def _chunks(self) -> Iterator[List[str]]:
+        for file in self.files:
+            with open_log_file(file, "rt", encoding="utf-8-sig") as f:
+                while True:
+                    lines = list(itertools.islice(f, self.chunk_size))
+                    if not lines:
+                        break
+                    yield lines
+
+    def __iter__(self) -> Iterator[UsageLogEntry]:
+        for entries in self._parse(parse_log_lines):
+            yield from entries
+
+    def batches(self) -> Iterator[UsageLogBatch]:
+        """Stream the entries as a UsageLogBatch per chunk of lines, without creating an object per entry."""
+        return self._parse(_parse_log_batch)
+
+    def read_batch(self) -> UsageLogBatch:
+        """Read all entries into a single UsageLogBatch."""
+        return UsageLogBatch.concatenate(self.batches())
+
+    def _parse(self, parse: Callable) -> Iterator[Any]:
+        self.skipped = 0
+
+        if self.processes is None or self.processes > 1:
+            results = self._parse_parallel(parse)
+        else:
+            results = map(parse, self._chunks())
+
+        for parsed, skipped in results:
+            self.skipped += skipped
+            yield parsed
+
+        if self.skipped:
+            CONSOLE_LOGGER.warning(f"Skipped {self.skipped} malformed lines reading usage logs.")
+
+    def _parse_parallel(self, parse: Callable) -> Iterator[Tuple[Any, int]]:
+        # only needed when reading in parallel, so not imported with the decorator
+        from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            # keep a bounded number of chunks in flight, yielding results in file order
+            max_in_flight = 2 * (self.processes or os.cpu_count() or 1)
+            in_flight = deque()
+            for lines in self._chunks():
+                in_flight.append(executor.submit(parse, lines))
+                if len(in_flight) >= max_in_flight:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
 
 def load_logs_from_file(filename:str) -> List[UsageLogEntry]:
-    logs:List[UsageLogEntry] = []
-
-    #adapted from https://stackoverflow.com/questions/30629297/remove-byte-order-mark-from-objects-in-a-list
-    #due to some files generated by BHoM logs being encoded with utf-8 BOM instead of utf-8
-    with open(filename, "r") as f:
-        lines = f.readlines()
-        if lines[0].__contains__(codecs.BOM_UTF8.decode(f.encoding)):
-            # A Byte Order Mark is present
-            lines[0] = lines[0].strip(codecs.BOM_UTF8.decode(f.encoding))
-        for line in lines:
-            if len(line) != 0:
-                logs.append(UsageLogEntry.from_json(line))
-
-    return logs
-
-def summarise_usage_logs(usage_log_entries:List[UsageLogEntry]) -> List[Dict]:
-    db_entries:List[Dict] = []
-
-    usage_log_entries.sort(key=lambda x: x.ProjectID)
-
-    for file_id, filegroup in groupby(usage_log_entries, lambda x: x.FileId):
-        filegroup = list(filegroup)
-        project_id = filegroup[0].ProjectID
-        filename = filegroup[0].FileName
-        filegroup.sort(key = lambda x: x.CallerName + str(x.SelectedItem))
-
-        for method_name, methodgroup in groupby(filegroup, lambda x: x.CallerName + str(x.SelectedItem)):
-            methodgroup = list(methodgroup)
-            first_entry = methodgroup[0]
-
-            db_entries.append({
-                "StartTime": bson_unix_ticks_to_datetime(min(methodgroup, key=lambda x: x.Time["$date"]).Time["$date"], short=True),
-                "EndTime": bson_unix_ticks_to_datetime(max(methodgroup, key=lambda x: x.Time["$date"]).Time["$date"], short=True),
-                "UI": first_entry.UI,
-                "UiVersion":first_entry.UiVersion,
-                "CallerName": first_entry.CallerName,
-                "SelectedItem": first_entry.SelectedItem,
-                "Computer": socket.gethostname(),
-                "UserName": os.environ.get("USERNAME"),
-                "BHoMVersion": BHOM_VERSION,
-                "FileId": file_id,
-                "FileName": filename,
-                "ProjectID": project_id,
-                "NbCallingComponents": len(set([a.ComponentId for a in methodgroup])),
-                "TotalNbCals": len(methodgroup),
-                "Errors": list(itertools.chain.from_iterable([x.Errors for x in methodgroup])),
-                "_t": "BH.oM.BHoMAnalytics.UsageEntry"
-            })
-
-    return db_entries
+    return list(UsageLogReader(filename))
+
+def _method_key(entry: UsageLogEntry) -> Tuple:
+    """A hashable key identifying the method called, equivalent to CallerName + str(SelectedItem)."""
+    selected = entry.SelectedItem
+    try:
+        if len(selected) == 3:
+            return (entry.CallerName, selected["MethodName"], selected["TypeName"], tuple(selected["Parameters"]))
+    except (KeyError, TypeError):
+        pass
+    return (entry.CallerName, str(selected))
+
+class UsageSummary():
+    """The running aggregate of all usage entries for one method called from one file.
+
+    Summaries can be updated one entry at a time and merged with each other, so that logs can
+    be summarised in a single pass, in parallel or incrementally.
+    """
+
+    __slots__ = (
+        "StartTime", "EndTime", "UI", "UiVersion", "CallerName", "SelectedItem",
+        "FileId", "FileName", "ProjectID", "ComponentIds", "TotalNbCals", "Errors",
+        "Durations", "DurationMax",
+    )
+
+    # durations are counted in logarithmic buckets, 16 per doubling, so percentiles are
+    # estimated to within about 2% using bounded, mergeable state
+    BUCKETS_PER_DOUBLING = 16
+
+    def __init__(self, entry: UsageLogEntry):
+        self.StartTime = self.EndTime = entry.Time["$date"]
+        self.UI = entry.UI
+        self.UiVersion = entry.UiVersion
+        self.CallerName = entry.CallerName
+        self.SelectedItem = entry.SelectedItem
+        self.FileId = entry.FileId
+        self.FileName = entry.FileName
+        self.ProjectID = entry.ProjectID
+        self.ComponentIds = set()
+        self.TotalNbCals = 0.0
+        self.Errors = []
+        self.Durations: Dict[int, int] = {}
+        self.DurationMax = None
+
+    def add(self, entry: UsageLogEntry) -> None:
+        """Add a usage entry to this summary."""
+        ticks = entry.Time["$date"]
+        if ticks < self.StartTime:
+            self.StartTime = ticks
+        elif ticks > self.EndTime:
+            self.EndTime = ticks
+        self.ComponentIds.add(entry.ComponentId)
+        self.TotalNbCals += _call_count(entry)
+        if entry.Errors:
+            self.Errors.extend(entry.Errors)
+        if entry.CustomData:
+            duration = entry.CustomData.get("WallTimeNs")
+            if duration is not None:
+                bucket = math.floor(math.log2(max(duration, 1)) * self.BUCKETS_PER_DOUBLING)
+                self.Durations[bucket] = self.Durations.get(bucket, 0) + 1
+                if self.DurationMax is None or duration > self.DurationMax:
+                    self.DurationMax = duration
+
+    def duration_percentile(self, percentile: float) -> Union[float, None]:
+        """Estimate a percentile (0-100) of the wall time of calls in nanoseconds, or None if
+        no durations were recorded."""
+        total = sum(self.Durations.values())
+        if total == 0:
+            return None
+        target = percentile / 100 * total
+        count = 0
+        for bucket in sorted(self.Durations):
+            count += self.Durations[bucket]
+            if count >= target:
+                return min(2 ** ((bucket + 0.5) / self.BUCKETS_PER_DOUBLING), self.DurationMax)
+        return float(self.DurationMax)
+
+    def merge(self, other: 'UsageSummary') -> None:
+        """Merge another summary, for the same file and method, into this one."""
+        self.StartTime = min(self.StartTime, other.StartTime)
+        self.EndTime = max(self.EndTime, other.EndTime)
+        self.ComponentIds |= other.ComponentIds
+        self.TotalNbCals += other.TotalNbCals
+        self.Errors.extend(other.Errors)
+        for bucket, count in other.Durations.items():
+            self.Durations[bucket] = self.Durations.get(bucket, 0) + count
+        if other.DurationMax is not None and (self.DurationMax is None or other.DurationMax > self.DurationMax):
+            self.DurationMax = other.DurationMax
+
+    def to_state(self) -> Dict:
+        """Convert to a JSON serialisable dict, from which the summary can be restored. The
+        state shares no mutable values with the summary, so a summary restored from it is an
+        independent copy."""
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["ComponentIds"] = sorted(self.ComponentIds, key=str)
+        state["Errors"] = list(self.Errors)
+        state["Durations"] = dict(self.Durations)
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'UsageSummary':
+        """Restore a summary from the output of to_state()."""
+        summary = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(summary, name, state[name])
+        summary.ComponentIds = set(state["ComponentIds"])
+        summary.Durations = {int(bucket): count for bucket, count in state["Durations"].items()}
+        return summary
+
+    def to_dict(self, computer: str = None, user_name: str = None, start_time: datetime = None, end_time: datetime = None) -> Dict:
+        """Convert to the BHoM UsageEntry format used by the analytics database."""
+        return {
+            "StartTime": bson_unix_ticks_to_datetime(self.StartTime, short=True) if start_time is None else start_time,
+            "EndTime": bson_unix_ticks_to_datetime(self.EndTime, short=True) if end_time is None else end_time,
+            "UI": self.UI,
+            "UiVersion": self.UiVersion,
+            "CallerName": self.CallerName,
+            "SelectedItem": self.SelectedItem,
+            "Computer": socket.gethostname() if computer is None else computer,
+            "UserName": os.environ.get("USERNAME") if user_name is None else user_name,
+            "BHoMVersion": get_bhom_version(),
+            "FileId": self.FileId,
+            "FileName": self.FileName,
+            "ProjectID": self.ProjectID,
+            "NbCallingComponents": len(self.ComponentIds),
+            "TotalNbCals": round(self.TotalNbCals),
+            "Errors": list(self.Errors),
+            "DurationP50": _ns_to_ms(self.duration_percentile(50)),
+            "DurationP95": _ns_to_ms(self.duration_percentile(95)),
+            "DurationMax": _ns_to_ms(self.DurationMax),
+            "_t": "BH.oM.BHoMAnalytics.UsageEntry"
+        }
+
+def _ns_to_ms(duration: Union[float, None]) -> Union[float, None]:
+    return None if duration is None else duration / 1e6
+
+def aggregate_usage_logs(usage_log_entries: Iterable[UsageLogEntry], summaries: Dict[Tuple, UsageSummary] = None) -> Dict[Tuple, UsageSummary]:
+    """Aggregate usage entries into a UsageSummary per file and method, in a single pass.
+
+    Args:
+        usage_log_entries (Iterable[UsageLogEntry]):
+            The entries to aggregate, for example a list or a UsageLogReader.
+        summaries (Dict[Tuple, UsageSummary], optional):
+            Existing summaries to update in place. Defaults to None.
+
+    Returns:
+        Dict[Tuple, UsageSummary]:
+            The summaries, keyed by file ID and method.
+    """
+    if summaries is None:
+        summaries = {}
+
+    for entry in usage_log_entries:
+        key = (entry.FileId, _method_key(entry))
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = UsageSummary(entry)
+        summary.add(entry)
+
+    return summaries
+
+def summarise_usage_logs(usage_log_entries: Iterable[UsageLogEntry]) -> List[Dict]:
+    """Summarise usage entries per file and method, in the format used by the analytics database.
+
+    Args:
+        usage_log_entries (Iterable[UsageLogEntry]):
+            The entries to summarise, for example a list or a UsageLogReader.
+
+    Returns:
+        List[Dict]:
+            A summary per file and method, ordered by project ID and method. Where entries
+            record their wall time, the summaries include the estimated median and 95th
+            percentile, and the maximum, wall time of calls in milliseconds. See
+            summarise_durations for these per CallerName.
+    """
+    return summaries_to_dicts(aggregate_usage_logs(usage_log_entries).values())
+
+def summarise_durations(usage_log_entries: Iterable[UsageLogEntry]) -> List[Dict]:
+    """Summarise the wall time of calls per CallerName, across all files and projects.
+
+    summarise_usage_logs reports durations per file and method, the granularity of the analytics
+    database. This gives the breakdown per function, to find the slowest functions overall.
+
+    Args:
+        usage_log_entries (Iterable[UsageLogEntry]):
+            The entries to summarise, for example a list or a UsageLogReader.
+
+    Returns:
+        List[Dict]:
+            A dict per CallerName, ordered by CallerName, of the number of calls and the
+            estimated median and 95th percentile, and the maximum, wall time of calls in
+            milliseconds (None where no entries record their wall time).
+    """
+    callers: Dict[str, UsageSummary] = {}
+    for summary in aggregate_usage_logs(usage_log_entries).values():
+        if summary.CallerName in callers:
+            callers[summary.CallerName].merge(summary)
+        else:
+            callers[summary.CallerName] = summary
+
+    return [
+        {
+            "CallerName": caller_name,
+            "TotalNbCals": round(summary.TotalNbCals),
+            "DurationP50": _ns_to_ms(summary.duration_percentile(50)),
+            "DurationP95": _ns_to_ms(summary.duration_percentile(95)),
+            "DurationMax": _ns_to_ms(summary.DurationMax),
+        }
+        for caller_name, summary in sorted(callers.items())
+    ]
+
+def summaries_to_dicts(summaries: Iterable[UsageSummary]) -> List[Dict]:
+    """Convert summaries into the format used by the analytics database.
+
+    Args:
+        summaries (Iterable[UsageSummary]):
+            The summaries, for example the values returned by aggregate_usage_logs.
+
+    Returns:
+        List[Dict]:
+            A dict per summary, ordered by project ID and method.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    computer = socket.gethostname()
+    user_name = os.environ.get("USERNAME")
+
+    summaries = sorted(summaries, key=lambda x: (x.ProjectID or "", x.CallerName + str(x.SelectedItem)))
+    ticks = np.array([(summary.StartTime, summary.EndTime) for summary in summaries], dtype=np.int64).reshape(-1, 2)
+    times = bson_unix_ticks_to_datetime_array(ticks, short=True).astype(object)
+    return [
+        summary.to_dict(computer, user_name, start_time, end_time)
+        for summary, (start_time, end_time) in zip(summaries, times)
+    ]
+
+def _tuples(value: Any) -> Any:
+    """Recursively convert lists, as read from JSON, back into tuples."""
+    if isinstance(value, list):
+        return tuple(_tuples(i) for i in value)
+    return value
+
+def summaries_to_state(summaries: Dict[Tuple, UsageSummary]) -> List:
+    """Get the JSON serialisable state of summaries, to resume aggregating them later.
+
+    Args:
+        summaries (Dict[Tuple, UsageSummary]):
+            The summaries, as returned by aggregate_usage_logs.
+
+    Returns:
+        List:
+            The key and UsageSummary.to_state() of each summary.
+    """
+    return [[key, summary.to_state()] for key, summary in summaries.items()]
+
+def summaries_from_state(state: List) -> Dict[Tuple, UsageSummary]:
+    """Rebuild summaries from the state given by summaries_to_state, once decoded from JSON.
+
+    Args:
+        state (List):
+            The state of the summaries.
+
+    Returns:
+        Dict[Tuple, UsageSummary]:
+            The summaries, keyed as aggregate_usage_logs keys them.
+    """
+    return {_tuples(key): UsageSummary.from_state(summary) for key, summary in state}
+
+class IncrementalUsageSummariser():
+    """Summarise usage logs that only grow, parsing only what was appended since the last run.
+
+    For each log file, the byte offset reached and the partial UsageSummary aggregates are saved
+    in a sidecar checkpoint file next to the log. Each call to summarise() resumes from the saved
+    offset and merges the new entries into the saved aggregates, so its cost depends on the new
+    data only. A trailing line that is still being written is left for the next run. If a log no
+    longer starts with the bytes it did when checkpointed (for example after rotation), it is
+    summarised from the start again.
+
+    Args:
+        source (Union[str, Path, Iterable[Union[str, Path]]], optional):
+            The logs to summarise, as accepted by UsageLogReader. Defaults to None, for all usage
+            logs in BHOM_LOG_FOLDER.
+        checkpoint_suffix (str, optional):
+            The suffix appended to a log file name to give its checkpoint file.
+            Defaults to ".checkpoint.json".
+        chunk_size (int, optional):
+            The number of lines parsed at a time. Defaults to 10000.
+    """
+
+    HEAD_SIZE = 256
+
+    def __init__(self, source: Union[str, Path, Iterable[Union[str, Path]]] = None, checkpoint_suffix: str = ".checkpoint.json", chunk_size: int = 10000):
+        self.source = source
+        self.checkpoint_suffix = checkpoint_suffix
+        self.chunk_size = chunk_size
+        self.skipped = 0
+
+    def summarise(self) -> List[Dict]:
+        """Update the checkpoints with newly appended entries, and summarise all entries.
+
+        Returns:
+            List[Dict]:
+                The same summaries as summarise_usage_logs over all entries in the logs.
+        """
+        self.skipped = 0
+        summaries: Dict[Tuple, UsageSummary] = {}
+        for log_file in _resolve_log_files(self.source):
+            for key, summary in self._update(log_file).items():
+                if key in summaries:
+                    summaries[key].merge(summary)
+                else:
+                    summaries[key] = summary
+
+        return summaries_to_dicts(summaries.values())
+
+    def _update(self, log_file: Path) -> Dict[Tuple, UsageSummary]:
+        checkpoint_file = log_file.with_name(log_file.name + self.checkpoint_suffix)
+        offset, head, summaries = 0, "", {}
+
+        with open_log_file(log_file, "rb") as f:
+            if checkpoint_file.exists():
+                state = json.loads(checkpoint_file.read_text(encoding="utf-8"))
+                f.seek(0)
+                if hashlib.sha1(f.read(min(self.HEAD_SIZE, state["offset"]))).hexdigest() == state["head"]:
+                    offset, head = state["offset"], state["head"]
+                    summaries = summaries_from_state(state["summaries"])
+
+            start = offset
+            f.seek(offset)
+            if offset == 0 and f.read(len(codecs.BOM_UTF8)) != codecs.BOM_UTF8:
+                f.seek(0)
+            offset = f.tell()
+
+            lines: List[str] = []
+            for raw_line in f:
+                line = raw_line.decode("utf-8", errors="replace")
+                if not raw_line.endswith(b"\n") and parse_log_lines([line])[1]:
+                    # an incomplete line, still being written
+                    break
+                offset += len(raw_line)
+                lines.append(line)
+                if len(lines) >= self.chunk_size:
+                    self._aggregate(lines, summaries)
+                    lines = []
+            self._aggregate(lines, summaries)
+
+            if offset != start:
+                f.seek(0)
+                head = hashlib.sha1(f.read(min(self.HEAD_SIZE, offset))).hexdigest()
+
+        if offset != start:
+            state = {"offset": offset, "head": head, "summaries": summaries_to_state(summaries)}
+            temp_file = checkpoint_file.with_name(checkpoint_file.name + ".tmp")
+            temp_file.write_text(json.dumps(state, default=str), encoding="utf-8")
+            os.replace(temp_file, checkpoint_file)
+
+        return summaries
+
+    def _aggregate(self, lines: List[str], summaries: Dict[Tuple, UsageSummary]) -> None:
+        entries, skipped = parse_log_lines(lines)
+        self.skipped += skipped
+        aggregate_usage_logs(entries, summaries)
+
+_LOG_FILE_PATTERN = re.compile(r"^Usage_(?P<package>.+?)_(?P<date>\d{8})(?:_(?P<shard>.*?))?\.log(?:\.\d+)?(?:\.gz|\.xz)?$")
+
+# columns of a compacted usage log archive, besides Time and the measures split out of
+# CustomData (see UsageLogBatch.MEASURES) all are dictionary-encoded strings
+ARCHIVE_COLUMNS = (
+    "Time", "BHoMVersion", "BHoM_Guid", "CallerName", "ComponentId", "CustomData", "Errors", "FileId",
+    "FileName", "Fragments", "Name", "ProjectID", "SelectedItem", "UI", "UiVersion", *UsageLogBatch.MEASURES,
+)
+_JSON_COLUMNS = ("CustomData", "Errors", "Fragments", "SelectedItem")
+_ARCHIVE_DTYPES = {"Time": "int64", **{measure: "float64" for measure in UsageLogBatch.MEASURES}}
+
+def _encode_archive(entries: List[UsageLogEntry]) -> Dict[str, "np.ndarray"]:
+    """Convert usage entries into time-sorted, dictionary-encoded columns."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    entries = sorted(entries, key=lambda x: x.Time["$date"])
+
+    arrays = {"Time": np.array([i.Time["$date"] for i in entries], dtype=np.int64)}
+
+    # per-call measures differ between almost all entries, so are kept out of CustomData
+    measures, custom_data = _split_measures([i.CustomData for i in entries])
+    arrays.update(measures)
+
+    for column in ARCHIVE_COLUMNS[1:-len(UsageLogBatch.MEASURES)]:
+        if column == "CustomData":
+            strings = [json.dumps(i, default=str) for i in custom_data]
+        elif column in _JSON_COLUMNS:
+            strings = [json.dumps(getattr(i, column), default=str) for i in entries]
+        else:
+            strings = ["" if getattr(i, column) is None else str(getattr(i, column)) for i in entries]
+        # encoded before converting to a fixed width array, which is as wide as its longest
+        # string, so that a long value (such as a stack trace) is only held once
+        values: List[str] = []
+        arrays[f"{column}_codes"] = _dictionary_encode(strings, {}, values)
+        arrays[f"{column}_values"] = np.array(values, dtype=str)
+
+    # the time range, together with the ProjectID and CallerName values, index the archive
+    arrays["index_time"] = np.array([arrays["Time"][0], arrays["Time"][-1]], dtype=np.int64)
+    return arrays
+
+def compact_usage_logs(
+    source: Union[str, Path, Iterable[Union[str, Path]]] = None,
+    archive_folder: Union[str, Path] = None,
+    remove_logs: bool = False,
+) -> List[Path]:
+    """Convert finished daily usage logs into columnar archives.
+
+    The logs for each package and day (before today) are written to one uncompressed NumPy
+    "Usage_<package>_<date>.npz" archive, holding the entries sorted by time. Besides "Time" and
+    the per-call measures (see UsageLogBatch.MEASURES), which are split out of CustomData into
+    float64 columns, every column is stored as a dictionary of distinct values and an array of
+    integer codes.
+    Archives are only rewritten when a log has been modified since the archive was written.
+
+    Args:
+        source (Union[str, Path, Iterable[Union[str, Path]]], optional):
+            The logs to compact, as accepted by UsageLogReader. Defaults to None, for all usage
+            logs in BHOM_LOG_FOLDER.
+        archive_folder (Union[str, Path], optional):
+            The folder to write archives to. Defaults to None, for BHOM_LOG_FOLDER / "Archive".
+        remove_logs (bool, optional):
+            If True, delete logs once they have been archived. Defaults to False.
+
+    Returns:
+        List[Path]:
+            The archives written.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    archive_folder = BHOM_LOG_FOLDER / "Archive" if archive_folder is None else Path(archive_folder)
+    today = datetime.now().strftime("%Y%m%d")
+
+    days: Dict[Tuple[str, str], List[Path]] = {}
+    for log_file in _resolve_log_files(source):
+        match = _LOG_FILE_PATTERN.match(log_file.name)
+        if match is None or match["date"] >= today:
+            continue
+        days.setdefault((match["package"], match["date"]), []).append(log_file)
+
+    archives: List[Path] = []
+    for (package, date), log_files in sorted(days.items()):
+        archive = archive_folder / f"Usage_{package}_{date}.npz"
+        if archive.exists() and archive.stat().st_mtime >= max(i.stat().st_mtime for i in log_files):
+            continue
+
+        entries = list(UsageLogReader(log_files))
+        if entries:
+            archive_folder.mkdir(parents=True, exist_ok=True)
+            np.savez(archive, **_encode_archive(entries))
+            archives.append(archive)
+
+        if remove_logs:
+            for log_file in log_files:
+                log_file.unlink()
+
+    return archives
+
+def query_usage_archive(
+    archive_folder: Union[str, Path] = None,
+    columns: Iterable[str] = ARCHIVE_COLUMNS,
+    start: Union[datetime, "np.datetime64"] = None,
+    end: Union[datetime, "np.datetime64"] = None,
+    project_ids: Iterable[str] = None,
+    caller_names: Iterable[str] = None,
+) -> Dict[str, "np.ndarray"]:
+    """Read usage entries from columnar archives, loading only the requested columns.
+
+    Archives outside the date range, or without the requested projects or callers, are skipped
+    using their index without loading any columns. Within an archive, only the rows in the date
+    range are decoded.
+
+    Args:
+        archive_folder (Union[str, Path], optional):
+            The folder containing the archives. Defaults to None, for BHOM_LOG_FOLDER / "Archive".
+        columns (Iterable[str], optional):
+            The columns to return. Defaults to all of ARCHIVE_COLUMNS.
+        start (Union[datetime, np.datetime64], optional):
+            The earliest (UTC) time of entries to return. Defaults to None.
+        end (Union[datetime, np.datetime64], optional):
+            The latest (UTC) time of entries to return. Defaults to None.
+        project_ids (Iterable[str], optional):
+            Only return entries for these project IDs. Defaults to None.
+        caller_names (Iterable[str], optional):
+            Only return entries for these callers. Defaults to None.
+
+    Returns:
+        Dict[str, np.ndarray]:
+            An array per column. "Time" is in BSON unix ticks (short), the measures are floats (NaN
+            where not recorded), other columns are strings, JSON encoded for CustomData, Errors,
+            Fragments and SelectedItem.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    archive_folder = BHOM_LOG_FOLDER / "Archive" if archive_folder is None else Path(archive_folder)
+    columns = list(columns)
+    unknown = set(columns).difference(ARCHIVE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown archive columns {sorted(unknown)}, columns must be in {ARCHIVE_COLUMNS}.")
+
+    start_ticks = None if start is None else int(bson_unix_ticks_array(start, short=True))
+    end_ticks = None if end is None else int(bson_unix_ticks_array(end, short=True))
+    filters = {"ProjectID": project_ids, "CallerName": caller_names}
+
+    parts: Dict[str, List[np.ndarray]] = {column: [] for column in columns}
+    for archive in sorted(archive_folder.glob("Usage_*.npz")):
+        with np.load(archive) as data:
+            first, last = data["index_time"]
+            if (start_ticks is not None and last < start_ticks) or (end_ticks is not None and first > end_ticks):
+                continue
+
+            wanted_codes = {}
+            for column, wanted in filters.items():
+                if wanted is not None:
+                    wanted_codes[column] = np.flatnonzero(np.isin(data[f"{column}_values"], list(wanted)))
+            if any(len(codes) == 0 for codes in wanted_codes.values()):
+                continue
+
+            ticks = data["Time"]
+            lo = 0 if start_ticks is None else np.searchsorted(ticks, start_ticks, side="left")
+            hi = len(ticks) if end_ticks is None else np.searchsorted(ticks, end_ticks, side="right")
+            rows = np.arange(lo, hi)
+            for column, codes in wanted_codes.items():
+                rows = rows[np.isin(data[f"{column}_codes"][rows], codes)]
+            if len(rows) == 0:
+                continue
+
+            for column in columns:
+                if column == "Time":
+                    parts[column].append(ticks[rows])
+                elif column in UsageLogBatch.MEASURES:
+                    # archives written before the measures were split out do not have them
+                    parts[column].append(data[column][rows] if column in data.files else np.full(len(rows), np.nan))
+                else:
+                    parts[column].append(data[f"{column}_values"][data[f"{column}_codes"][rows]])
+
+    return {
+        column: np.concatenate(arrays) if arrays else np.array([], dtype=_ARCHIVE_DTYPES.get(column, str))
+        for column, arrays in parts.items()
+    }
+
+def merge_log_shards(log_folder: Union[str, Path] = None, remove_shards: bool = True) -> List[Path]:
+    """Combine the per-process shards of finished days into one log per package and day.
+
+    Shards ("Usage_<package>_<date>_<host>_<pid>.log") of days before today are appended, in
+    name order, to "Usage_<package>_<date>.log" (after any entries it already holds). The merged
+    log is written to a temporary file and moved into place, so it is never left half written.
+
+    Args:
+        log_folder (Union[str, Path], optional):
+            The folder containing the shards. Defaults to None, for BHOM_LOG_FOLDER.
+        remove_shards (bool, optional):
+            If True, delete the shards once merged. Defaults to True.
+
+    Returns:
+        List[Path]:
+            The merged logs written.
+    """
+    log_folder = BHOM_LOG_FOLDER if log_folder is None else Path(log_folder)
+    today = datetime.now().strftime("%Y%m%d")
+
+    days: Dict[Tuple[str, str], List[Path]] = {}
+    for log_file in _usage_logs(log_folder, "Usage_*_*_*.log"):
+        match = _LOG_FILE_PATTERN.match(log_file.name)
+        if match is None or match["date"] >= today or match["shard"] is None:
+            continue
+        days.setdefault((match["package"], match["date"]), []).append(log_file)
+
+    merged_logs: List[Path] = []
+    for (package, date), shards in sorted(days.items()):
+        merged_log = log_folder / f"Usage_{package}_{date}.log"
+        temp_file = merged_log.with_name(merged_log.name + ".tmp")
+        with open(temp_file, "wb") as merged:
+            for log_file in ([merged_log] if merged_log.exists() else []) + shards:
+                with open_log_file(log_file, "rb") as f:
+                    data = f.read()
+                if data.startswith(codecs.BOM_UTF8):
+                    data = data[len(codecs.BOM_UTF8):]
+                if data and not data.endswith(b"\n"):
+                    data += b"\n"
+                merged.write(data)
+        os.replace(temp_file, merged_log)
+        merged_logs.append(merged_log)
+
+        if remove_shards:
+            for log_file in shards:
+                log_file.unlink()
+
+    return merged_logs
 
 def convert_exc_info_to_bhom_error(exc_info):
     time = bson_unix_ticks(datetime.now(), short=True)
@@ -119,18 +1016,281 @@ def set_project_number(project_number: Union[str, None]):
     PROJECT_NUMBER = project_number
     
 def get_project_number() -> Union[str, None]:
-    CONSOLE_LOGGER.debug(f"Retrieving project number: {PROJECT_NUMBER}")
+    CONSOLE_LOGGER.debug("Retrieving project number: %s", PROJECT_NUMBER)
     return PROJECT_NUMBER
 
-def bhom_analytics(project_id:Callable = get_project_number, disable:bool = DISABLE_ANALYTICS) -> Callable:
+global ENABLED
+ENABLED = not DISABLE_ANALYTICS
+
+def set_enabled(enabled: bool):
+    """Switch analytics capture on or off at runtime for all decorated functions.
+
+    While disabled, decorated functions call straight through to the original function.
+    Functions decorated while analytics was disabled through DISABLE_BHOM_ANALYTICS or
+    `disable=True` are left undecorated, so are not affected by this switch.
+    """
+    global ENABLED
+    CONSOLE_LOGGER.debug(f"Setting bhom_analytics enabled: {ENABLED} to {enabled}")
+    ENABLED = bool(enabled)
+
+def is_enabled() -> bool:
+    return ENABLED
+
+_LOG_FILES: Dict[str, Tuple[float, str]] = {}
+if hasattr(os, "register_at_fork"):
+    # the process ID is part of the log file name, so child processes need their own
+    os.register_at_fork(after_in_child=_LOG_FILES.clear)
+
+def _usage_log_file(package: str) -> str:
+    """Return the usage log file for a package, only rebuilding the path when the day changes.
+
+    Each process writes to its own shard of the day's log, named by host and process ID, so
+    processes never contend for the same file. Shards are combined using merge_log_shards().
+    """
+    now = time.time()
+    expires, log_file = _LOG_FILES.get(package, (0.0, ""))
+    if now < expires:
+        return log_file
+
+    today = datetime.fromtimestamp(now)
+    tomorrow = datetime.combine(today.date() + timedelta(days=1), datetime.min.time())
+    host = re.sub(r"[^A-Za-z0-9.-]", "-", socket.gethostname())
+    log_file = str(BHOM_LOG_FOLDER / f"Usage_{package}_{today.strftime('%Y%m%d')}_{host}_{os.getpid()}.log")
+    _LOG_FILES[package] = (tomorrow.timestamp(), log_file)
+    return log_file
+
+@lru_cache(maxsize=256)
+def _file_id(project_id: str) -> str:
+    """For now for file IDs, generate one using the project ID."""
+    return str(uuid.uuid3(uuid.NAMESPACE_OID, project_id))
+
+def _new_entry(template: Dict[str, Any], pid: Union[str, None], time_ms: int) -> Dict[str, Any]:
+    """Fill in the per-call values of a usage entry template."""
+    file_id = _file_id("" if pid is None else pid)
+
+    entry = template.copy()
+    entry["BHoMVersion"] = get_bhom_version()
+    entry["BHoM_Guid"] = uuid.uuid4()
+    entry["FileId"] = file_id
+    entry["FileName"] = file_id
+    entry["ProjectID"] = pid
+    entry["Errors"] = []
+    entry["Time"] = {"$date": time_ms}
+    return entry
+
+class _RateLimiter():
+    """Token bucket allowing up to `max_per_second` usage entries per second."""
+
+    def __init__(self, max_per_second: float):
+        self.rate = max_per_second
+        self.tokens = max(1.0, max_per_second)
+        self.last = time.monotonic()
+
+    def acquire(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class _CallAggregator():
+    """Counts calls to a decorated function in memory, emitting one summarised usage entry
+    per project every `interval` seconds, and any remaining counts on exit."""
+
+    MAX_ERRORS = 10
+
+    def __init__(self, template: Dict[str, Any], package: str, interval: float):
+        self.template = template
+        self.package = package
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.window_end = 0.0
+        self.counts: Dict[Union[str, None], List] = {}
+        _AGGREGATORS.append(self)
+
+    def record(self, pid: Union[str, None], error: Union[Dict, None] = None):
+        now = time.time()
+        with self.lock:
+            counts = self.counts.get(pid)
+            if counts is None:
+                # call count, error count, first errors, time of first call
+                counts = self.counts[pid] = [0, 0, [], time.time_ns() // 1_000_000]
+                if not self.window_end:
+                    self.window_end = now + self.interval
+                    _flush_aggregators_at_child_exit()
+            counts[0] += 1
+            if error is not None:
+                counts[1] += 1
+                if len(counts[2]) < self.MAX_ERRORS:
+                    counts[2].append(error)
+            if now < self.window_end:
+                return
+            emitted, self.counts, self.window_end = self.counts, {}, 0.0
+        self._emit(emitted)
+
+    def flush(self):
+        with self.lock:
+            emitted, self.counts, self.window_end = self.counts, {}, 0.0
+        self._emit(emitted)
+
+    def _emit(self, emitted: Dict[Union[str, None], List]):
+        for pid, (n_calls, n_errors, errors, first_time) in emitted.items():
+            entry = _new_entry(self.template, pid, first_time)
+            entry["CustomData"] = {**self.template["CustomData"], "CallCount": n_calls, "ErrorCount": n_errors}
+            entry["Errors"] = errors
+            ANALYTICS_WRITER.submit(_usage_log_file(self.package), entry)
+
+_AGGREGATORS: List[_CallAggregator] = []
+
+@atexit.register
+def _flush_aggregators():
+    # registered after the writer is created, so runs before the writer is closed
+    for aggregator in _AGGREGATORS:
+        aggregator.flush()
+
+# the process whose exit flushes the aggregators, see _flush_aggregators_at_child_exit()
+_FLUSHED_PID = os.getpid()
+
+def _flush_aggregators_at_child_exit():
+    """In a forked child, which may exit without running atexit handlers, flush the aggregators
+    from a multiprocessing exit handler, registered once, ahead of the writer's."""
+    global _FLUSHED_PID
+    if _FLUSHED_PID != os.getpid():
+        _FLUSHED_PID = os.getpid()
+        run_at_child_exit(_flush_aggregators, WRITER_EXIT_PRIORITY + 1)
+
+def _reset_aggregators():
+    # counts recorded before a fork are emitted by the parent, so the child starts afresh
+    for aggregator in _AGGREGATORS:
+        aggregator.lock = threading.Lock()
+        aggregator.counts, aggregator.window_end = {}, 0.0
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_aggregators)
+
+def _start_memory_trace() -> Tuple[bool, int]:
+    """Start tracing allocations if not already, returning whether tracing was started here
+    and the memory traced so far."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    else:
+        tracemalloc.reset_peak()
+    return started, tracemalloc.get_traced_memory()[0]
+
+def _stop_memory_trace(memory_trace: Tuple[bool, int]) -> int:
+    """Return the peak memory allocated since _start_memory_trace(), stopping tracing if it was started there."""
+    started, baseline = memory_trace
+    peak = tracemalloc.get_traced_memory()[1]
+    if started:
+        tracemalloc.stop()
+    return max(0, peak - baseline)
+
+def _run_generator_in_span(generator: Generator, span_id: Any) -> Generator:
+    """Drive a generator, making span_id the current span only while the generator's own code
+    runs, so that code run by the consumer between items is not attributed to it."""
+    send_value, throw_exc = None, None
+    while True:
+        span_token = CURRENT_SPAN.set(span_id) if span_id is not None else None
+        try:
+            if throw_exc is not None:
+                item = generator.throw(throw_exc)
+            else:
+                item = generator.send(send_value)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            throw_exc = None
+            if span_token is not None:
+                CURRENT_SPAN.reset(span_token)
+        try:
+            send_value = yield item
+        except GeneratorExit:
+            generator.close()
+            raise
+        except Exception as exc:  # pylint: disable=broad-except
+            throw_exc = exc
+
+def _call_count(entry: UsageLogEntry) -> float:
+    """The number of calls a usage entry represents, allowing for sampled and aggregated entries."""
+    if not entry.CustomData:
+        return 1
+    return entry.CustomData.get("CallCount", 1) / entry.CustomData.get("SampleRate", 1)
+
+def bhom_analytics(
+    project_id:Callable = get_project_number,
+    disable:bool = DISABLE_ANALYTICS,
+    sample_rate:float = 1.0,
+    max_per_second:float = None,
+    aggregate:bool = False,
+    aggregate_interval:float = 60.0,
+    trace_memory:bool = TRACE_MEMORY,
+) -> Callable:
     """Decorator for capturing usage data.
 
+    If analytics is disabled when the function is decorated (through DISABLE_BHOM_ANALYTICS
+    or `disable=True`), the function is returned untouched so there is no overhead at all.
+    Otherwise analytics can be switched on and off at runtime using set_enabled().
+
+    For functions called in tight loops, the volume of usage entries can be reduced with
+    `sample_rate` and `max_per_second`, or by aggregating calls so that one summarised entry
+    is written per interval, with "CallCount" and "ErrorCount" in its CustomData.
+
+    Each (non-aggregated) entry records the wall time of the call ("WallTimeNs") and the CPU
+    time used by the process during the call ("CpuTimeNs") in its CustomData, and optionally
+    the peak memory allocated during the call ("PeakMemoryBytes"). Calls made from within
+    another decorated call record the BHoM_Guid of that call as their "ParentSpanId", and can
+    be collected and exported as a trace using python_toolkit.bhom.tracing.
+
+    Generator functions, coroutine functions and asynchronous generator functions are timed over
+    their whole iteration or await, rather than until the generator or coroutine is created, and
+    errors raised while iterating or awaiting are recorded against the call. Entries are only
+    queued for the background writer, so (with the default "drop" queue policy) decorated
+    coroutines never block the event loop on log I/O.
+
+    Calls to (non-generator, non-coroutine) decorated functions can be profiled with cProfile
+    on demand, using python_toolkit.bhom.profiling or the BHOM_ANALYTICS_PROFILE environment
+    variable.
+
+    When BHOM_ANALYTICS_COLLECTOR is set, entries are sent to a collector process
+    (python_toolkit.bhom.collector) instead of being written to a usage log per process.
+
+    Arguments
+    ---------
+    project_id : Callable, optional
+        A function returning the current project ID. Defaults to get_project_number.
+    disable : bool, optional
+        If True, return functions undecorated. Defaults to DISABLE_ANALYTICS.
+    sample_rate : float, optional
+        The proportion of calls (0-1) that are logged, chosen at random. Logged entries record
+        the rate as "SampleRate" in their CustomData. Defaults to 1.0.
+    max_per_second : float, optional
+        The maximum number of entries logged per second (greater than 0), further calls are not
+        logged. Defaults to None, for no limit.
+    aggregate : bool, optional
+        If True, count calls in memory and log one summarised entry per project every
+        `aggregate_interval` seconds. Defaults to False.
+    aggregate_interval : float, optional
+        The number of seconds over which calls are aggregated. Defaults to 60.0.
+    trace_memory : bool, optional
+        If True, trace allocations with tracemalloc to record the peak memory allocated during
+        each call. This slows calls down considerably, and nested traced calls reset the peak of
+        the calls they are nested in. Defaults to TRACE_MEMORY, which is set by the
+        BHOM_ANALYTICS_TRACE_MEMORY environment variable.
+
     Returns
     -------
     Callable
         The decorated function.
     """
 
+    if not 0 < sample_rate <= 1:
+        raise ValueError("The sample_rate must be greater than 0 and at most 1.")
+    if max_per_second is not None and not max_per_second > 0:
+        raise ValueError("The max_per_second must be greater than 0, or None for no limit.")
+
     _componentId = uuid.uuid4()
 
     def decorator(function: Callable):
@@ -147,70 +1307,209 @@ def bhom_analytics(project_id:Callable = get_project_number, disable:bool = DISA
             The decorated function.
         """
 
+        if disable:
+            CONSOLE_LOGGER.debug("bhom_analytics is curently disabled.")
+            return function
+
+        # get the data being passed to the function, expected dtype and return type
+        argspec = dict(inspect.getfullargspec(function).annotations)
+        argspec.pop("return", None)
+
+        _args = [f'{{"_t": "{argspec[k]}", "Name": "{k}"}}' for k in argspec.keys()]
+
+        custom_data = {"interpreter": sys.executable}
+        if sample_rate < 1:
+            custom_data["SampleRate"] = sample_rate
+
+        # everything that does not change between calls is computed once, here
+        template = {
+            "BHoMVersion": None,  # looked up on the first call, not when decorating at import
+            "BHoM_Guid": None,
+            "CallerName": function.__name__,
+            "ComponentId": str(_componentId),
+            "CustomData": custom_data,
+            "Errors": None,
+            "FileId": None,
+            "FileName": None,
+            "Fragments": [],
+            "Name": "",
+            "ProjectID": None,
+            "SelectedItem": {
+                "MethodName": function.__name__,
+                "Parameters": _args,
+                "TypeName": f"{function.__module__}.{function.__qualname__}"
+            },
+            "Time": None,
+            "UI": "Python",
+            "UiVersion": sys.version,
+            "_t": "BH.oM.Base.UsageLogEntry",
+        }
+        package = function.__module__.split(".")[0]
+
+        sampled = sample_rate < 1
+        limiter = None if max_per_second is None else _RateLimiter(max_per_second)
+        filtered = sampled or limiter is not None
+        aggregator = _CallAggregator(template, package, aggregate_interval) if aggregate else None
+
+        def should_record() -> bool:
+            """Apply sampling and rate limiting to a call."""
+            if sampled and random.random() >= sample_rate:
+                return False
+            return limiter is None or limiter.acquire()
+
+        def begin() -> Tuple:
+            """Start recording a call, returning its state and the span it runs in (if any)."""
+            pid = project_id()
+            if aggregator is not None:
+                return (pid, None, None, None, 0, 0), None
+
+            exec_metadata = _new_entry(template, pid, time.time_ns() // 1_000_000)
+            memory_trace = _start_memory_trace() if trace_memory else None
+            call = (pid, exec_metadata, CURRENT_SPAN.get(), memory_trace, time.process_time_ns(), time.perf_counter_ns())
+            return call, exec_metadata["BHoM_Guid"]
+
+        def end(call: Tuple, exc_info: Tuple = None) -> None:
+            """Finish recording a call, passing the entry to the writer (or aggregator)."""
+            end_wall = time.perf_counter_ns()
+            end_cpu = time.process_time_ns()
+            pid, exec_metadata, parent_id, memory_trace, start_cpu, start_wall = call
+            error = None if exc_info is None else convert_exc_info_to_bhom_error(exc_info)
+
+            if aggregator is not None:
+                aggregator.record(pid, error)
+                return
+
+            if error is not None:
+                exec_metadata["Errors"].append(error)
+            wall_time = end_wall - start_wall
+            exec_metadata["CustomData"] = {**custom_data, "WallTimeNs": wall_time, "CpuTimeNs": end_cpu - start_cpu}
+            if parent_id is not None:
+                exec_metadata["CustomData"]["ParentSpanId"] = parent_id
+            if memory_trace is not None:
+                exec_metadata["CustomData"]["PeakMemoryBytes"] = _stop_memory_trace(memory_trace)
+            if TRACER.enabled:
+                TRACER.record(function.__name__, start_wall, wall_time, exec_metadata["BHoM_Guid"], parent_id, error is not None)
+
+            # serialisation and file I/O happen on the background writer thread
+            ANALYTICS_WRITER.submit(_usage_log_file(package), exec_metadata)
+
+        if inspect.isgeneratorfunction(function):
+
+            @wraps(function)
+            def generator_wrapper(*args, **kwargs) -> Any:
+                """A wrapper around the generator that captures usage analytics over the whole iteration."""
+
+                if not ENABLED or (filtered and not should_record()):
+                    return (yield from function(*args, **kwargs))
+
+                call, span_id = begin()
+                try:
+                    result = yield from _run_generator_in_span(function(*args, **kwargs), span_id)
+                except GeneratorExit:
+                    # the consumer stopped iterating early, which is not an error
+                    end(call)
+                    raise
+                except Exception as exc:  # pylint: disable=broad-except
+                    end(call, sys.exc_info())
+                    raise exc
+                end(call)
+                return result
+
+            return generator_wrapper
+
+        if inspect.isasyncgenfunction(function):
+
+            @wraps(function)
+            async def async_generator_wrapper(*args, **kwargs) -> Any:
+                """A wrapper around the asynchronous generator that captures usage analytics over the whole iteration."""
+
+                record = ENABLED and (not filtered or should_record())
+                call, span_id = begin() if record else (None, None)
+                agen = function(*args, **kwargs)
+                send_value, throw_exc = None, None
+                try:
+                    while True:
+                        # the span is only current while the generator's own code runs
+                        span_token = CURRENT_SPAN.set(span_id) if span_id is not None else None
+                        try:
+                            if throw_exc is not None:
+                                item = await agen.athrow(throw_exc)
+                            else:
+                                item = await agen.asend(send_value)
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            throw_exc = None
+                            if span_token is not None:
+                                CURRENT_SPAN.reset(span_token)
+                        try:
+                            send_value = yield item
+                        except GeneratorExit:
+                            await agen.aclose()
+                            raise
+                        except Exception as exc:  # pylint: disable=broad-except
+                            throw_exc = exc
+                except GeneratorExit:
+                    if record:
+                        end(call)
+                    raise
+                except Exception as exc:  # pylint: disable=broad-except
+                    if record:
+                        end(call, sys.exc_info())
+                    raise exc
+                if record:
+                    end(call)
+
+            return async_generator_wrapper
+
+        if inspect.iscoroutinefunction(function):
+
+            @wraps(function)
+            async def coroutine_wrapper(*args, **kwargs) -> Any:
+                """A wrapper around the coroutine that captures usage analytics until it completes."""
+
+                if not ENABLED or (filtered and not should_record()):
+                    return await function(*args, **kwargs)
+
+                call, span_id = begin()
+                # a coroutine is always resumed in the context of its task, so the span can be
+                # set for its whole run
+                span_token = CURRENT_SPAN.set(span_id) if span_id is not None else None
+                try:
+                    result = await function(*args, **kwargs)
+                except Exception as exc:  # pylint: disable=broad-except
+                    end(call, sys.exc_info())
+                    raise exc
+                finally:
+                    if span_token is not None:
+                        CURRENT_SPAN.reset(span_token)
+                end(call)
+                return result
+
+            return coroutine_wrapper
+
         @wraps(function)
         def wrapper(*args, **kwargs) -> Any:
             """A wrapper around the function that captures usage analytics."""
 
-            if disable:
-                CONSOLE_LOGGER.debug("bhom_analytics is curently disabled.")
-                return function(*args, **kwargs)
-            
-            _id = uuid.uuid4()
+            if PROFILER.enabled and PROFILER.should_profile(function.__name__):
+                # the profiled call comes back through this wrapper, to record it as usual
+                return PROFILER.profile(function.__name__, wrapper, *args, **kwargs)
 
-            #for now for file IDs, generate one using the project ID
-            pid = project_id()
-            if pid == None:
-                pid = ""
-
-            file_id = uuid.uuid3(uuid.NAMESPACE_OID, pid)
-
-            # get the data being passed to the function, expected dtype and return type
-            argspec = inspect.getfullargspec(function)[-1]
-            argspec.pop("return", None)
-
-            _args = [f'{{"_t": "{argspec[k]}", "Name": "{k}"}}' for k in argspec.keys()]
-
-            exec_metadata = {
-                "BHoMVersion": BHOM_VERSION,
-                "BHoM_Guid": _id,
-                "CallerName": function.__name__,
-                "ComponentId": _componentId,
-                "CustomData": {"interpreter": sys.executable},
-                "Errors": [],
-                "FileId": str(file_id),
-                "FileName": str(file_id),
-                "Fragments": [],
-                "Name": "",
-                "ProjectID": project_id(),
-                "SelectedItem": {
-                    "MethodName": function.__name__,
-                    "Parameters": _args,
-                    "TypeName": f"{function.__module__}.{function.__qualname__}"
-                },
-                "Time": {
-                    "$date": bson_unix_ticks(short=True),
-                },
-                "UI": "Python",
-                "UiVersion": sys.version,
-                "_t": "BH.oM.Base.UsageLogEntry",
-            }
+            if not ENABLED or (filtered and not should_record()):
+                return function(*args, **kwargs)
 
+            call, span_id = begin()
+            span_token = CURRENT_SPAN.set(span_id) if span_id is not None else None
             try:
                 result = function(*args, **kwargs)
             except Exception as exc:  # pylint: disable=broad-except
-                exec_metadata["Errors"].extend(convert_exc_info_to_bhom_error(sys.exc_info()))
+                end(call, sys.exc_info())
                 raise exc
             finally:
-                log_file = BHOM_LOG_FOLDER / f"Usage_{function.__module__.split('.')[0]}_{datetime.now().strftime('%Y%m%d')}.log"
-
-                if ANALYTICS_LOGGER.handlers[0].baseFilename != str(log_file):
-                    ANALYTICS_LOGGER.handlers[0].close()
-                    ANALYTICS_LOGGER.handlers[0].baseFilename = str(log_file)
-
-                ANALYTICS_LOGGER.info(
-                    json.dumps(exec_metadata, default=str, indent=None)
-                )
-
+                if span_token is not None:
+                    CURRENT_SPAN.reset(span_token)
+            end(call)
             return result
 
         return wrapper
@@ -0,0 +1,220 @@
+"""A collector process, aggregating the usage entries sent by many processes into daily summaries.
+
+Start a collector with:
+
+    python -m python_toolkit.bhom.collector [--address udp://127.0.0.1:50123] [--output-folder DIR] [--flush-interval 60]
+
+and set the BHOM_ANALYTICS_COLLECTOR environment variable to the same address (or to an empty
+string, for the default address) in the processes to collect from. Their bhom_analytics usage
+entries are then sent to the collector as datagrams rather than written to a log per process.
+"""
+
+# pylint: disable=E0401
+import argparse
+import json
+import os
+import socket
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+# pylint: enable=E0401
+
+from .analytics import (
+    UsageSummary,
+    aggregate_usage_logs,
+    parse_log_lines,
+    summaries_from_state,
+    summaries_to_dicts,
+    summaries_to_state,
+)
+from .logging import CONSOLE_LOGGER
+from .logging.writer import DEFAULT_COLLECTOR_ADDRESS, parse_collector_address
+from . import BHOM_LOG_FOLDER
+
+
+class UsageCollector():
+    """Receive usage entries over UDP or a Unix domain socket and aggregate them in memory.
+
+    Entries are aggregated into a UsageSummary per day (UTC), file and method. Every
+    `flush_interval` seconds, the summaries of each day updated since the last flush are written
+    to "Collected_YYYYMMDD.json" in the output folder, replacing the file atomically. The file
+    holds the summaries in the format used by the analytics database, and the state needed to
+    resume aggregating, so a restarted collector carries on where it left off.
+
+    Args:
+        address (str, optional):
+            The address to listen on, "udp://host:port" or "unix:///path/to/socket". A port of
+            0 listens on a free port, given by `address` once bound. Defaults to
+            DEFAULT_COLLECTOR_ADDRESS.
+        output_folder (Union[str, Path], optional):
+            The folder the summaries are written to. Defaults to None, for BHOM_LOG_FOLDER / "Collected".
+        flush_interval (float, optional):
+            The time in seconds between writes of the summaries. Defaults to 60.0.
+    """
+
+    BUFFER_SIZE = 65536
+
+    def __init__(self, address: str = DEFAULT_COLLECTOR_ADDRESS, output_folder: Union[str, Path] = None, flush_interval: float = 60.0):
+        self.family, bind_address = parse_collector_address(address)
+        self.output_folder = BHOM_LOG_FOLDER / "Collected" if output_folder is None else Path(output_folder)
+        self.flush_interval = flush_interval
+        self.received = 0
+        self.skipped = 0
+
+        self._summaries: Dict[str, Dict[Tuple, UsageSummary]] = {}
+        self._updated = set()
+        self._flushed = set()
+        self._stopping = False
+
+        if self.family != socket.AF_INET and os.path.exists(bind_address):
+            # a socket file left behind by a collector that did not shut down cleanly
+            os.unlink(bind_address)
+        self._socket = socket.socket(self.family, socket.SOCK_DGRAM)
+        self._socket.bind(bind_address)
+
+        if self.family == socket.AF_INET:
+            host, port = self._socket.getsockname()
+            self.address = f"udp://{host}:{port}"
+        else:
+            self.address = f"unix://{bind_address}"
+
+    def serve(self, duration: float = None) -> None:
+        """Receive and aggregate entries until stop() is called, or for `duration` seconds.
+
+        Args:
+            duration (float, optional):
+                The time in seconds to serve for. Defaults to None, to serve until stopped.
+        """
+        end = None if duration is None else time.monotonic() + duration
+        next_flush = time.monotonic() + self.flush_interval
+        try:
+            while not self._stopping:
+                now = time.monotonic()
+                if end is not None and now >= end:
+                    break
+                if now >= next_flush:
+                    self.flush()
+                    next_flush = now + self.flush_interval
+
+                # wake up regularly, to notice stop() being called from another thread
+                timeout = next_flush - now if end is None else min(next_flush, end) - now
+                self._socket.settimeout(min(max(timeout, 0.01), 0.5))
+                try:
+                    datagram = self._socket.recv(self.BUFFER_SIZE)
+                except socket.timeout:
+                    continue
+                self.add(datagram.decode("utf-8", errors="replace").split("\n"))
+        finally:
+            self.flush()
+
+    def stop(self) -> None:
+        """Stop serving, after writing the summaries."""
+        self._stopping = True
+
+    def close(self) -> None:
+        """Close the socket, removing the socket file of a Unix domain socket."""
+        bind_address = self._socket.getsockname()
+        self._socket.close()
+        if self.family != socket.AF_INET and bind_address and os.path.exists(bind_address):
+            os.unlink(bind_address)
+
+    def add(self, lines: List[str]) -> None:
+        """Aggregate usage log lines, as they would be written to a usage log."""
+        entries, skipped = parse_log_lines(lines)
+        self.received += len(entries)
+        self.skipped += skipped
+
+        days: Dict[str, list] = {}
+        for entry in entries:
+            day = datetime.fromtimestamp(entry.Time["$date"] / 1000, tz=timezone.utc).strftime("%Y%m%d")
+            days.setdefault(day, []).append(entry)
+
+        for day, day_entries in days.items():
+            aggregate_usage_logs(day_entries, self._day(day))
+            self._updated.add(day)
+
+    def summarise(self) -> List[Dict]:
+        """Get the summaries of all entries received, in the format used by the analytics database.
+
+        Days that have been flushed out of memory are read back from their summary files.
+        """
+        summaries: Dict[Tuple, UsageSummary] = {}
+        for day in sorted(self._summaries.keys() | self._flushed):
+            in_memory = day in self._summaries
+            for key, summary in (self._summaries[day] if in_memory else self._load_day(day)).items():
+                if key in summaries:
+                    summaries[key].merge(summary)
+                else:
+                    # a copy, so that merging does not change the summary of the day
+                    summaries[key] = UsageSummary.from_state(summary.to_state()) if in_memory else summary
+        return summaries_to_dicts(summaries.values())
+
+    def flush(self) -> List[Path]:
+        """Write the summaries of each day updated since the last flush.
+
+        Returns:
+            List[Path]:
+                The summary files written.
+        """
+        written = []
+        today = datetime.now(timezone.utc).strftime("%Y%m%d")
+        for day in sorted(self._updated):
+            summaries = self._summaries[day]
+            state = {
+                "summaries": summaries_to_dicts(summaries.values()),
+                "state": summaries_to_state(summaries),
+            }
+            self.output_folder.mkdir(parents=True, exist_ok=True)
+            summary_file = self._summary_file(day)
+            temp_file = summary_file.with_name(summary_file.name + ".tmp")
+            temp_file.write_text(json.dumps(state, default=str), encoding="utf-8")
+            os.replace(temp_file, summary_file)
+            written.append(summary_file)
+
+            # days before today are unlikely to receive more entries, and are reloaded if they do
+            if day < today:
+                del self._summaries[day]
+                self._flushed.add(day)
+        self._updated.clear()
+        return written
+
+    def _summary_file(self, day: str) -> Path:
+        return self.output_folder / f"Collected_{day}.json"
+
+    def _day(self, day: str) -> Dict[Tuple, UsageSummary]:
+        summaries = self._summaries.get(day)
+        if summaries is None:
+            summaries = self._summaries[day] = self._load_day(day)
+            self._flushed.discard(day)
+        return summaries
+
+    def _load_day(self, day: str) -> Dict[Tuple, UsageSummary]:
+        summary_file = self._summary_file(day)
+        if not summary_file.exists():
+            return {}
+        state = json.loads(summary_file.read_text(encoding="utf-8"))
+        return summaries_from_state(state["state"])
+
+
+def main(argv: List[str] = None) -> None:
+    """Run a collector from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m python_toolkit.bhom.collector", description=__doc__.splitlines()[0])
+    parser.add_argument("--address", default=DEFAULT_COLLECTOR_ADDRESS, help="udp://host:port or unix:///path/to/socket")
+    parser.add_argument("--output-folder", default=None, help="the folder summaries are written to")
+    parser.add_argument("--flush-interval", type=float, default=60.0, help="the time in seconds between writes of the summaries")
+    args = parser.parse_args(argv)
+
+    collector = UsageCollector(args.address, args.output_folder, args.flush_interval)
+    CONSOLE_LOGGER.info(f"Collecting usage entries on {collector.address}, writing summaries to {collector.output_folder}.")
+    try:
+        collector.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.close()
+
+
+if __name__ == "__main__":
+    main()
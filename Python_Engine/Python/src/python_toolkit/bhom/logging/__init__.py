@@ -1,2 +1,3 @@
 from .file import ANALYTICS_LOGGER
 from .console import CONSOLE_LOGGER
+from .writer import ANALYTICS_WRITER
@@ -1,23 +1,102 @@
 """Logging utilities for BHoM analytics."""
 
 # pylint: disable=E0401
+import gzip
 import logging
+import lzma
+import os
+import shutil
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import IO, Union
 
 # pylint: enable=E0401
 
 
 from .. import TOOLKIT_NAME, BHOM_LOG_FOLDER
 
+# The compression of rotated logs, one of "gzip", "lzma" or "none", and the number kept.
+COMPRESSION = os.environ.get("BHOM_LOG_COMPRESSION", "gzip").lower()
+BACKUP_COUNT = int(os.environ.get("BHOM_LOG_BACKUP_COUNT", 10))
+
+COMPRESSED_SUFFIXES = {"gzip": ".gz", "lzma": ".xz"}
+_OPENERS = {".gz": gzip.open, ".xz": lzma.open}
+
+
+def open_log_file(path: Union[str, Path], mode: str = "rb", encoding: str = None) -> IO:
+    """Open a log file for reading, decompressing rotated logs compressed with gzip or lzma.
+
+    Args:
+        path (Union[str, Path]):
+            The log file.
+        mode (str, optional):
+            "rb" or "rt". Defaults to "rb".
+        encoding (str, optional):
+            The encoding of a file opened in text mode. Defaults to None.
+
+    Returns:
+        IO:
+            The open file, which streams the decompressed contents of compressed logs.
+    """
+    opener = _OPENERS.get(Path(path).suffix, open)
+    return opener(path, mode, encoding=encoding)  # pylint: disable=consider-using-with
+
+
+class AppendingRotatingFileHandler(RotatingFileHandler):
+    """A RotatingFileHandler that writes each record to an unbuffered, append-only file with a
+    single write, so a record (such as a batch of usage log lines) is never split or interleaved
+    with writes from other threads or processes.
+
+    Rotated logs are compressed with `compression` ("gzip", "lzma" or "none"), and named
+    "<log>.1.gz", "<log>.2.gz" and so on (or ".xz"), up to `backupCount` of them. Compression
+    happens on rollover, on the thread writing the record, which for usage logs is the
+    background writer thread.
+    """
+
+    def __init__(self, filename: str, *args, compression: str = "none", **kwargs):
+        if compression != "none" and compression not in COMPRESSED_SUFFIXES:
+            raise ValueError(f'The log compression must be one of "none", "gzip" or "lzma", not "{compression}".')
+        super().__init__(filename, *args, **kwargs)
+        self.compression = compression
+        if compression != "none":
+            self.namer = self._compressed_name
+            self.rotator = self._compress
+
+    def _compressed_name(self, default_name: str) -> str:
+        return default_name + COMPRESSED_SUFFIXES[self.compression]
+
+    def _compress(self, source: str, dest: str) -> None:
+        with open(source, "rb") as f_in, _OPENERS[COMPRESSED_SUFFIXES[self.compression]](dest, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return open(self.baseFilename, "ab", buffering=0)  # pylint: disable=consider-using-with
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            data = (self.format(record) + self.terminator).encode(self.encoding or "utf-8")
+            while data:
+                data = data[self.stream.write(data):]
+        except Exception:  # pylint: disable=broad-except
+            self.handleError(record)
+
+
 formatter = logging.Formatter("%(message)s")
-handler = RotatingFileHandler(
+handler = AppendingRotatingFileHandler(
     str(BHOM_LOG_FOLDER / f"{TOOLKIT_NAME}_{datetime.now().strftime('%Y%m%d')}.log"),
     mode="a",
-    maxBytes=25 * 1024 * 1024,  # 25mb max before file overwritten
-    backupCount=1,
+    maxBytes=25 * 1024 * 1024,  # 25mb max before file rotated
+    backupCount=BACKUP_COUNT,
     encoding="utf-8",
     delay=True,  # wait until all logs collected before writing
+    compression=COMPRESSION,
 )
 handler.setLevel(logging.DEBUG)
 handler.setFormatter(formatter)
@@ -0,0 +1,319 @@
+"""Background, batched writer for BHoM analytics usage logs."""
+
+# pylint: disable=E0401
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Tuple, Union
+
+# pylint: enable=E0401
+
+from .file import ANALYTICS_LOGGER
+
+# Policies applied when the queue of pending entries is full.
+DROP = "drop"
+BLOCK = "block"
+
+# the address a collector (see python_toolkit.bhom.collector) listens on by default
+DEFAULT_COLLECTOR_ADDRESS = "udp://127.0.0.1:50123"
+
+# the largest datagram sent to a collector, below the maximum UDP payload of 65507 bytes
+MAX_DATAGRAM_SIZE = 60000
+
+
+# the priority of the writer's exit handler in a multiprocessing child, handlers with a higher
+# priority (such as those queueing further entries) run first
+WRITER_EXIT_PRIORITY = 10
+
+
+def run_at_child_exit(callback: Callable[[], Any], priority: int = WRITER_EXIT_PRIORITY) -> None:
+    """Call a function when the current multiprocessing child process exits.
+
+    Child processes started by multiprocessing exit with os._exit(), which skips handlers
+    registered with atexit, but they do run multiprocessing's own exit handlers. These are
+    cleared when a child starts, so must be registered from the child itself.
+
+    Args:
+        callback (Callable[[], Any]):
+            The function to call.
+        priority (int, optional):
+            Handlers with a higher priority are called first. Defaults to WRITER_EXIT_PRIORITY.
+    """
+    from multiprocessing.util import Finalize  # pylint: disable=import-outside-toplevel
+
+    Finalize(None, callback, exitpriority=priority)
+
+
+def parse_collector_address(address: str) -> Tuple[int, Union[str, Tuple[str, int]]]:
+    """Parse a collector address, either "udp://host:port" or "unix:///path/to/socket".
+
+    Args:
+        address (str):
+            The address.
+
+    Returns:
+        Tuple[int, Union[str, Tuple[str, int]]]:
+            The socket address family and the address, as accepted by socket.connect().
+    """
+    if address.startswith("unix://"):
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError(f"Unix domain sockets are not supported on this platform, use a udp:// address rather than {address}.")
+        return socket.AF_UNIX, address[len("unix://"):]
+    if address.startswith("udp://"):
+        host, _, port = address[len("udp://"):].rpartition(":")
+        if host and port.isdigit():
+            return socket.AF_INET, (host, int(port))
+    raise ValueError(f'A collector address must be "udp://host:port" or "unix:///path/to/socket", not "{address}".')
+
+
+class AnalyticsWriter:
+    """A bounded queue of usage log entries, written to file in batches by a daemon thread.
+
+    The only work done on the calling thread is a single enqueue. Serialisation to JSON
+    and file I/O happen on the writer thread, which writes a batch once `batch_size`
+    entries have been queued or `flush_interval` seconds have passed since the first
+    entry of the batch was queued, whichever comes first. Pending entries are written
+    when the interpreter exits.
+
+    When the queue is full, the behaviour is set by `policy`:
+
+    - "drop": the new entry is discarded and counted in `dropped`. Callers never wait.
+    - "block": the caller waits until the writer has made room (back-pressure), so no
+      entries are lost at the cost of slowing the caller down to the speed of the disk.
+
+    If a `collector` address is given, batches are sent as datagrams to a collector process
+    (python_toolkit.bhom.collector) instead of being written to the log files, so that many
+    processes do not each write their own logs. Sockets are non-blocking: entries that cannot
+    be sent are written to the log files as usual. A missing collector is detected before each
+    batch is sent for a Unix domain socket, and for UDP on the loopback interface (the default),
+    where an empty probe datagram is refused straight away. UDP gives no such guarantee for a
+    collector on another host: entries sent while it is not listening are lost without error.
+
+    Args:
+        logger (logging.Logger, optional):
+            The logger whose first handler receives the batches. Defaults to ANALYTICS_LOGGER.
+        max_queue_size (int, optional):
+            The maximum number of entries waiting to be written. Defaults to 10000.
+        batch_size (int, optional):
+            The maximum number of entries written in one batch. Defaults to 500.
+        flush_interval (float, optional):
+            The maximum time in seconds an entry waits before being written. Defaults to 1.0.
+        policy (str, optional):
+            One of "drop" or "block". Defaults to "drop".
+        collector (str, optional):
+            The address of a collector to send entries to, as accepted by
+            parse_collector_address(). Defaults to None, which writes entries to the log files.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger = ANALYTICS_LOGGER,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        policy: str = DROP,
+        collector: str = None,
+    ):
+        if policy not in (DROP, BLOCK):
+            raise ValueError(f'The queue policy must be one of "{DROP}" or "{BLOCK}", not "{policy}".')
+
+        self.logger = logger
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.dropped = 0
+        self.collector = None if collector is None else parse_collector_address(collector)
+
+        self._pid = os.getpid()
+        self._after_fork()
+
+    def submit(self, log_file: str, entry: Dict[str, Any]) -> bool:
+        """Queue a usage log entry to be written to the given log file.
+
+        Args:
+            log_file (str):
+                The path of the log file the entry should be written to.
+            entry (Dict[str, Any]):
+                The JSON serialisable usage log entry.
+
+        Returns:
+            bool:
+                False if the entry was dropped because the queue was full, otherwise True.
+        """
+
+        if len(self._pending) >= self.max_queue_size:
+            if self.policy == DROP:
+                self.dropped += 1
+                return False
+            with self._drained:
+                while len(self._pending) >= self.max_queue_size and self._thread is not None:
+                    self._full.set()
+                    self._drained.wait(self.flush_interval)
+
+        # started here, after any wait, so an entry queued once close() has stopped the writer
+        # thread is still written
+        if self._thread is None:
+            self._start()
+
+        # appending to a deque is thread safe, so the writer thread is only woken for the
+        # first entry of a batch and once a batch is full
+        self._pending.append((log_file, entry))
+        if not self._ready.is_set():
+            self._ready.set()
+        elif len(self._pending) >= self.batch_size:
+            self._full.set()
+        return True
+
+    def flush(self) -> None:
+        """Block until all entries queued so far have been written."""
+
+        self._drain()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write any pending entries and stop the writer thread.
+
+        Args:
+            timeout (float, optional):
+                The maximum time in seconds to wait for the writer thread to stop. Defaults to 5.0.
+        """
+
+        with self._lock:
+            thread = self._thread
+            if thread is not None:
+                self._stopping = True
+                self._ready.set()
+                self._full.set()
+                thread.join(timeout)
+                self._thread = None
+
+        self._drain()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            if self._pid != os.getpid():
+                # in a forked child, which may exit without running atexit handlers, so the
+                # queue is drained by an exit handler registered when the child first uses it
+                self._pid = os.getpid()
+                run_at_child_exit(self.close, WRITER_EXIT_PRIORITY)
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="BHoMAnalyticsWriter", daemon=True)
+            self._thread.start()
+
+    def _after_fork(self) -> None:
+        # the writer thread does not survive a fork, so the child starts its own on first use
+        self._pending: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._ready = threading.Event()
+        self._full = threading.Event()
+        self._drained = threading.Condition()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stopping = False
+        self._thread: threading.Thread = None
+        self._socket: socket.socket = None
+
+    def _run(self) -> None:
+        while not self._stopping:
+            # wait for the first entry of a batch, then until the batch is full or old enough
+            self._ready.wait()
+            self._full.wait(self.flush_interval)
+            self._ready.clear()
+            self._full.clear()
+            self._drain()
+
+    def _drain(self) -> None:
+        with self._write_lock:
+            while self._pending:
+                batch = []
+                while self._pending and len(batch) < self.batch_size:
+                    batch.append(self._pending.popleft())
+
+                try:
+                    self._write(batch)
+                except Exception:  # pylint: disable=broad-except
+                    # never let a failed write stop the writer, as entries would queue up forever
+                    pass
+
+                with self._drained:
+                    self._drained.notify_all()
+
+    def _write(self, batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+        lines: Dict[str, List[str]] = {}
+        for log_file, entry in batch:
+            lines.setdefault(log_file, []).append(json.dumps(entry, default=str, indent=None))
+
+        if self.collector is not None:
+            # only the lines that could not be sent are written to file
+            lines = {log_file: file_lines[self._send(file_lines):] for log_file, file_lines in lines.items()}
+            lines = {log_file: file_lines for log_file, file_lines in lines.items() if file_lines}
+
+        handler = self.logger.handlers[0]
+        for log_file, file_lines in lines.items():
+            if handler.baseFilename != log_file:
+                handler.close()
+                handler.baseFilename = log_file
+
+            self.logger.info("\n".join(file_lines))
+
+    def _send(self, lines: List[str]) -> int:
+        """Send lines to the collector, newline separated in as few datagrams as possible,
+        returning the number of lines sent before any failure."""
+        family, address = self.collector
+        sent, datagram, size = 0, [], 0
+        try:
+            if self._socket is None:
+                # connected, so that a refused datagram is reported by the socket
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                try:
+                    sock.connect(address)
+                except OSError:
+                    sock.close()
+                    raise
+                self._socket = sock
+
+            if family == socket.AF_INET:
+                # UDP sends succeed whether or not anything is listening, but an empty probe to
+                # a closed port on the loopback interface is refused before send() returns
+                self._socket.send(b"")
+                error = self._socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error:
+                    raise ConnectionRefusedError(error, os.strerror(error))
+
+            for line in lines:
+                data = line.encode("utf-8")
+                if datagram and size + len(data) + 1 > MAX_DATAGRAM_SIZE:
+                    self._socket.send(b"\n".join(datagram))
+                    sent += len(datagram)
+                    datagram, size = [], 0
+                datagram.append(data)
+                size += len(data) + 1
+            if datagram:
+                self._socket.send(b"\n".join(datagram))
+                sent += len(datagram)
+        except OSError:
+            # reconnect for the next batch, in case the collector is restarted
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+        return sent
+
+
+# if BHOM_ANALYTICS_COLLECTOR is set, entries are sent to the collector at that address, or at
+# DEFAULT_COLLECTOR_ADDRESS if it is empty, rather than written to per-process log files
+_COLLECTOR = os.environ.get("BHOM_ANALYTICS_COLLECTOR", None)
+
+ANALYTICS_WRITER = AnalyticsWriter(
+    policy=os.environ.get("BHOM_ANALYTICS_QUEUE_POLICY", DROP).lower(),
+    collector=None if _COLLECTOR is None else _COLLECTOR or DEFAULT_COLLECTOR_ADDRESS,
+)
+
+atexit.register(ANALYTICS_WRITER.close)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=ANALYTICS_WRITER._after_fork)  # pylint: disable=protected-access
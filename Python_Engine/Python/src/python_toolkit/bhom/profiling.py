@@ -0,0 +1,176 @@
+"""On demand cProfile profiling of calls to bhom_analytics decorated functions."""
+
+# pylint: disable=E0401
+import atexit
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Union
+
+# pylint: enable=E0401
+
+from . import BHOM_LOG_FOLDER, PROFILE_FUNCTIONS
+
+# Modes, writing a profile per call or the combined profile of all calls to each function.
+PER_CALL = "call"
+PER_FUNCTION = "function"
+
+
+class Profiler:
+    """Runs calls to chosen decorated functions under cProfile, writing the results as .prof files.
+
+    While disabled, which is the default, the only cost to a decorated call is checking
+    `enabled`. Calls made while another decorated call is being profiled on the same thread are
+    included in the outer profile, rather than profiled on their own. Profiles are written until
+    the .prof files written since profiling was enabled reach `max_bytes`, after which further
+    profiles are discarded and counted in `discarded`.
+
+    Profiles can be viewed with, for example, snakeviz or python -m pstats. Only functions
+    decorated while analytics was enabled can be profiled, as otherwise the decorator returns
+    them unwrapped.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.functions: Union[set, None] = None
+        self.mode = PER_FUNCTION
+        self.output_folder = BHOM_LOG_FOLDER / "Profiles"
+        self.max_bytes = 100 * 1024 * 1024
+        self.written_bytes = 0
+        self.discarded = 0
+
+        self._stats: Dict[str, Any] = {}
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._active = threading.local()
+
+    def enable(
+        self,
+        functions: Iterable[str] = None,
+        mode: str = PER_FUNCTION,
+        output_folder: Union[str, Path] = None,
+        max_bytes: int = 100 * 1024 * 1024,
+    ) -> None:
+        """Start profiling calls to the given functions. See python_toolkit.bhom.profiling.enable()."""
+        if mode not in (PER_CALL, PER_FUNCTION):
+            raise ValueError(f'The profiling mode must be one of "{PER_CALL}" or "{PER_FUNCTION}", not "{mode}".')
+
+        self.dump()
+        self.functions = None if functions is None else set(functions)
+        self.mode = mode
+        self.output_folder = BHOM_LOG_FOLDER / "Profiles" if output_folder is None else Path(output_folder)
+        self.max_bytes = max_bytes
+        self.written_bytes = 0
+        self.discarded = 0
+        self.enabled = True
+
+    def disable(self) -> List[Path]:
+        """Stop profiling, writing any combined profiles."""
+        self.enabled = False
+        return self.dump()
+
+    def should_profile(self, name: str) -> bool:
+        """Whether a call to the named function should be profiled, on this thread."""
+        return (self.functions is None or name in self.functions) and not getattr(self._active, "profiling", False)
+
+    def profile(self, name: str, function: Callable, *args, **kwargs) -> Any:
+        """Call the function under cProfile, recording the profile against the given name."""
+        import cProfile  # pylint: disable=import-outside-toplevel
+
+        profile = cProfile.Profile()
+        self._active.profiling = True
+        try:
+            return profile.runcall(function, *args, **kwargs)
+        finally:
+            self._active.profiling = False
+            self._record(name, profile)
+
+    def dump(self) -> List[Path]:
+        """Write the combined profile of each function profiled since the last dump.
+
+        Returns:
+            List[Path]:
+                The .prof files written.
+        """
+        with self._lock:
+            stats, self._stats = self._stats, {}
+
+        written = []
+        for name, function_stats in stats.items():
+            path = self._write(function_stats, f"{_safe_name(name)}_{os.getpid()}.prof")
+            if path is not None:
+                written.append(path)
+        return written
+
+    def _record(self, name: str, profile: Any) -> None:
+        import pstats  # pylint: disable=import-outside-toplevel
+
+        if self.mode == PER_CALL:
+            with self._lock:
+                self._counter += 1
+                counter = self._counter
+            self._write(pstats.Stats(profile), f"{_safe_name(name)}_{time.strftime('%Y%m%d%H%M%S')}_{os.getpid()}_{counter}.prof")
+            return
+
+        with self._lock:
+            if name in self._stats:
+                self._stats[name].add(profile)
+            else:
+                self._stats[name] = pstats.Stats(profile)
+
+    def _write(self, stats: Any, file_name: str) -> Union[Path, None]:
+        path = self.output_folder / file_name
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            if self.written_bytes >= self.max_bytes:
+                self.discarded += 1
+                return None
+            self.output_folder.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(str(path))
+            self.written_bytes += path.stat().st_size - previous
+        return path
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+PROFILER = Profiler()
+
+
+def enable(
+    functions: Iterable[str] = None,
+    mode: str = PER_FUNCTION,
+    output_folder: Union[str, Path] = None,
+    max_bytes: int = 100 * 1024 * 1024,
+) -> None:
+    """Start profiling calls to bhom_analytics decorated functions with cProfile.
+
+    Args:
+        functions (Iterable[str], optional):
+            The names of the decorated functions to profile, for example ["heatmap", "diurnal"].
+            Defaults to None, which profiles all decorated functions.
+        mode (str, optional):
+            "function" to write the combined profile of all calls to each function when
+            profiling is disabled (or the interpreter exits), or "call" to write a profile per
+            call. Defaults to "function".
+        output_folder (Union[str, Path], optional):
+            The folder .prof files are written to. Defaults to None, for BHOM_LOG_FOLDER / "Profiles".
+        max_bytes (int, optional):
+            The maximum total size of the .prof files written. Defaults to 100 MB.
+    """
+    PROFILER.enable(functions, mode, output_folder, max_bytes)
+
+
+def disable() -> List[Path]:
+    """Stop profiling, returning the combined profiles written."""
+    return PROFILER.disable()
+
+
+atexit.register(PROFILER.dump)
+
+# BHOM_ANALYTICS_PROFILE is a comma separated list of function names to profile, or "*" for all
+if PROFILE_FUNCTIONS is not None:
+    enable(None if PROFILE_FUNCTIONS.strip() == "*" else [i.strip() for i in PROFILE_FUNCTIONS.split(",") if i.strip()])
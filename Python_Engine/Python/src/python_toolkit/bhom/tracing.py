@@ -0,0 +1,116 @@
+"""Nested span tracing of calls to bhom_analytics decorated functions."""
+
+# pylint: disable=E0401
+import json
+import os
+import threading
+from collections import deque
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Tuple, Union
+
+# pylint: enable=E0401
+
+# The span (usage entry BHoM_Guid) of the decorated call currently running in this context.
+# Context variables follow threads and asyncio tasks, so nested calls find their parent.
+CURRENT_SPAN: ContextVar = ContextVar("bhom_analytics_span", default=None)
+
+
+class Tracer:
+    """Collects the spans of decorated calls in memory, for export as a Chrome trace.
+
+    While disabled, which is the default, spans are not collected, though parent spans are
+    always recorded in usage entries as "ParentSpanId". While enabled, recording a span is a
+    single append to a bounded deque, so tracing is cheap enough to leave on.
+
+    Args:
+        max_spans (int, optional):
+            The maximum number of spans kept, the oldest are discarded first. Defaults to 100000.
+    """
+
+    def __init__(self, max_spans: int = 100000):
+        self.enabled = False
+        self.spans: Deque[Tuple] = deque(maxlen=max_spans)
+
+    def enable(self, max_spans: int = None) -> None:
+        """Start collecting spans, optionally changing the maximum number kept."""
+        if max_spans is not None and max_spans != self.spans.maxlen:
+            self.spans = deque(self.spans, maxlen=max_spans)
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop collecting spans, keeping those already collected."""
+        self.enabled = False
+
+    def clear(self) -> None:
+        """Discard all collected spans."""
+        self.spans.clear()
+
+    def record(self, name: str, start_ns: int, duration_ns: int, span_id: Any, parent_id: Any, failed: bool) -> None:
+        """Record a finished span, timed using time.perf_counter_ns()."""
+        self.spans.append((name, start_ns, duration_ns, os.getpid(), threading.get_ident(), span_id, parent_id, failed))
+
+
+TRACER = Tracer()
+
+
+def enable(max_spans: int = None) -> None:
+    """Start collecting the spans of decorated calls in memory.
+
+    Args:
+        max_spans (int, optional):
+            The maximum number of spans kept. Defaults to None, leaving it unchanged.
+    """
+    TRACER.enable(max_spans)
+
+
+def disable() -> None:
+    """Stop collecting the spans of decorated calls."""
+    TRACER.disable()
+
+
+def _trace_event(name: str, ts_us: float, dur_us: float, pid: int, tid: int, span_id: Any, parent_id: Any, failed: bool) -> Dict[str, Any]:
+    args = {"SpanId": str(span_id)}
+    if parent_id is not None:
+        args["ParentSpanId"] = str(parent_id)
+    if failed:
+        args["Failed"] = True
+    return {"name": name, "cat": "bhom_analytics", "ph": "X", "ts": ts_us, "dur": dur_us, "pid": pid, "tid": tid, "args": args}
+
+
+def export_chrome_trace(path: Union[str, Path], usage_log_entries: Iterable[Any] = None) -> Path:
+    """Write spans in the Chrome trace event format, which can be opened as a flame chart in
+    Perfetto (https://ui.perfetto.dev) or chrome://tracing.
+
+    Args:
+        path (Union[str, Path]):
+            The JSON file to write.
+        usage_log_entries (Iterable[UsageLogEntry], optional):
+            Usage log entries to convert into spans, using their Time and the WallTimeNs and
+            ParentSpanId in their CustomData. Entries are grouped into a track per project.
+            Defaults to None, which writes the spans collected in memory by the tracer.
+
+    Returns:
+        Path:
+            The path of the file written.
+    """
+    events: List[Dict[str, Any]] = []
+
+    if usage_log_entries is None:
+        for name, start_ns, duration_ns, pid, tid, span_id, parent_id, failed in list(TRACER.spans):
+            events.append(_trace_event(name, start_ns / 1000, duration_ns / 1000, pid, tid, span_id, parent_id, failed))
+    else:
+        tracks: Dict[Any, int] = {}
+        for entry in usage_log_entries:
+            custom_data = entry.CustomData or {}
+            if "WallTimeNs" not in custom_data:
+                continue
+            tid = tracks.setdefault(entry.ProjectID, len(tracks))
+            events.append(_trace_event(
+                entry.CallerName, entry.Time["$date"] * 1000, custom_data["WallTimeNs"] / 1000, 0, tid,
+                entry.BHoM_Guid, custom_data.get("ParentSpanId"), bool(entry.Errors),
+            ))
+
+    path = Path(path)
+    path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+    return path
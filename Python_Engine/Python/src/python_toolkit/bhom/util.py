@@ -1,20 +1,27 @@
 """General utility functions."""
 # pylint: disable=E0401
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
 # pylint: enable=E0401
 
+if TYPE_CHECKING:
+    import numpy as np
 
-def bson_unix_ticks(date_time: datetime = datetime.utcnow(), short: bool = False) -> int:
+
+def bson_unix_ticks(date_time: datetime = None, short: bool = False) -> int:
     """Python implementation of unix ticks.
 
     Args:
-        date_time (datetime, optional): The datetime to convert to ticks. Defaults to datetime.utcnow().
+        date_time (datetime, optional): The datetime to convert to ticks. Defaults to None, for datetime.utcnow() at the time of the call.
         short (bool, optional): Whether to return the short ticks. Defaults to False.
 
     Returns:
         int: The ticks.
     """
 
+    if date_time is None:
+        date_time = datetime.utcnow()
+
     _ticks = (date_time - datetime(1970, 1, 1)).total_seconds() * 10**3
 
     if short:
@@ -29,3 +36,42 @@ def bson_unix_ticks_to_datetime(ticks: int, short:bool = False) -> datetime:
 
     return datetime(1970, 1, 1) + timedelta(milliseconds=ticks)
 
+def _naive_utc(date_times: Any) -> Any:
+    """Convert timezone aware pandas objects to naive UTC, leaving anything else as is."""
+    if hasattr(date_times, "dt") and getattr(date_times.dt, "tz", None) is not None:
+        return date_times.dt.tz_convert(None)
+    if getattr(date_times, "tz", None) is not None:
+        return date_times.tz_convert(None)
+    return date_times
+
+def bson_unix_ticks_array(date_times: Any, short: bool = False) -> "np.ndarray":
+    """Vectorised implementation of unix ticks.
+
+    Args:
+        date_times (Any): The datetimes to convert to ticks, for example a numpy datetime64 array, a pandas DatetimeIndex or Series, or a list of datetimes. Naive datetimes are taken to be UTC, timezone aware pandas objects are converted to UTC.
+        short (bool, optional): Whether to return the short ticks. Defaults to False.
+
+    Returns:
+        np.ndarray: The ticks, as int64.
+    """
+
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    unit = "ms" if short else "us"
+    return np.asarray(_naive_utc(date_times), dtype=f"datetime64[{unit}]").astype(np.int64)
+
+def bson_unix_ticks_to_datetime_array(ticks: Any, short: bool = False) -> "np.ndarray":
+    """Vectorised conversion of unix ticks to datetimes.
+
+    Args:
+        ticks (Any): The ticks to convert, as an array-like of integers.
+        short (bool, optional): Whether the ticks are short ticks. Defaults to False.
+
+    Returns:
+        np.ndarray: The naive UTC datetimes, as datetime64[ms] for short ticks or datetime64[us] for long ticks. Pass to pd.DatetimeIndex for a pandas index.
+    """
+
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    unit = "ms" if short else "us"
+    return np.asarray(ticks, dtype=np.int64).astype(f"datetime64[{unit}]")
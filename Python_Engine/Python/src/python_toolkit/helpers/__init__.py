@@ -1,22 +1,42 @@
-﻿from .timeseries import (
-    validate_timeseries,
-    timeseries_summary_monthly
-)
+﻿"""Helper functions, imported from their modules on first access."""
+import importlib
+
+# cardinality shares its name with its module, which would replace the function as an
+# attribute of this package if the module were imported directly first, so it is not lazy
 from .cardinality import (
     cardinality,
     angle_from_cardinal,
     angle_from_north,
     angle_to_vector
 )
-from .decay_rate import (
-    DecayMethod,
-    proximity_decay,
-    decay_rate_smoother
-)
-from .helpers import (
-    sanitise_string,
-    convert_keys_to_snake_case,
-    remove_leap_days,
-    timedelta_tostring,
-    safe_filename
-)
\ No newline at end of file
+
+_LAZY_ATTRIBUTES = {
+    "validate_timeseries": ".timeseries",
+    "timeseries_summary": ".timeseries",
+    "timeseries_summary_monthly": ".timeseries",
+    "DecayMethod": ".decay_rate",
+    "proximity_decay": ".decay_rate",
+    "decay_field": ".decay_rate",
+    "decay_rate_smoother": ".decay_rate",
+    "transition_mask": ".decay_rate",
+    "DecayRateSmoother": ".decay_rate",
+    "sanitise_string": ".helpers",
+    "convert_keys_to_snake_case": ".helpers",
+    "remove_leap_days": ".helpers",
+    "timedelta_tostring": ".helpers",
+    "safe_filename": ".helpers",
+}
+
+__all__ = ["cardinality", "angle_from_cardinal", "angle_from_north", "angle_to_vector", *_LAZY_ATTRIBUTES]
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()).union(_LAZY_ATTRIBUTES))
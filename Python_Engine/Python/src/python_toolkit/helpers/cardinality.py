@@ -2,108 +2,29 @@
 
 from ..bhom.analytics import bhom_analytics
 
-@bhom_analytics()
-def cardinality(direction_angle: float, directions: int = 16):
-    """Returns the cardinal orientation of a given angle, where that angle is related to north at
-        0 degrees.
-    Args:
-        direction_angle (float):
-            The angle to north in degrees (+Ve is interpreted as clockwise from north at 0.0
-            degrees).
-        directions (int):
-            The number of cardinal directions into which angles shall be binned (This value should
-            be one of 4, 8, 16 or 32, and is centred about "north").
-    Returns:
-        int:
-            The cardinal direction the angle represents.
-    """
-
-    if direction_angle > 360 or direction_angle < 0:
-        raise ValueError(
-            "The angle entered is beyond the normally expected range for an orientation in degrees."
-        )
-
-    cardinal_directions = {
-        4: ["N", "E", "S", "W"],
-        8: ["N", "NE", "E", "SE", "S", "SW", "W", "NW"],
-        16: [
-            "N",
-            "NNE",
-            "NE",
-            "ENE",
-            "E",
-            "ESE",
-            "SE",
-            "SSE",
-            "S",
-            "SSW",
-            "SW",
-            "WSW",
-            "W",
-            "WNW",
-            "NW",
-            "NNW",
-        ],
-        32: [
-            "N",
-            "NbE",
-            "NNE",
-            "NEbN",
-            "NE",
-            "NEbE",
-            "ENE",
-            "EbN",
-            "E",
-            "EbS",
-            "ESE",
-            "SEbE",
-            "SE",
-            "SEbS",
-            "SSE",
-            "SbE",
-            "S",
-            "SbW",
-            "SSW",
-            "SWbS",
-            "SW",
-            "SWbW",
-            "WSW",
-            "WbS",
-            "W",
-            "WbN",
-            "WNW",
-            "NWbW",
-            "NW",
-            "NWbN",
-            "NNW",
-            "NbW",
-        ],
-    }
-
-    if directions not in cardinal_directions:
-        raise ValueError(
-            f'The input "directions" must be one of {list(cardinal_directions.keys())}.'
-        )
-
-    val = int((direction_angle / (360 / directions)) + 0.5)
-
-    arr = cardinal_directions[directions]
-
-    return arr[(val % directions)]
-
-@bhom_analytics()
-def angle_from_cardinal(cardinal_direction: str) -> float:
-    """
-    For a given cardinal direction, return the corresponding angle in degrees.
-
-    Args:
-        cardinal_direction (str):
-            The cardinal direction.
-    Returns:
-        float:
-            The angle associated with the cardinal direction.
-    """
-    cardinal_directions = [
+# the labels of the cardinal directions, clockwise from north, for each number of directions
+CARDINAL_DIRECTIONS = {
+    4: ("N", "E", "S", "W"),
+    8: ("N", "NE", "E", "SE", "S", "SW", "W", "NW"),
+    16: (
+        "N",
+        "NNE",
+        "NE",
+        "ENE",
+        "E",
+        "ESE",
+        "SE",
+        "SSE",
+        "S",
+        "SSW",
+        "SW",
+        "WSW",
+        "W",
+        "WNW",
+        "NW",
+        "NNW",
+    ),
+    32: (
         "N",
         "NbE",
         "NNE",
@@ -136,44 +57,133 @@ def angle_from_cardinal(cardinal_direction: str) -> float:
         "NWbN",
         "NNW",
         "NbW",
-    ]
-    if cardinal_direction not in cardinal_directions:
-        raise ValueError(f"{cardinal_direction} is not a known cardinal_direction.")
-    angles = np.arange(0, 360, 11.25)
+    ),
+}
 
-    lookup = dict(zip(cardinal_directions, angles))
+@bhom_analytics(aggregate=True)
+def cardinality(direction_angle: float | np.ndarray, directions: int = 16):
+    """Returns the cardinal orientation of a given angle, where that angle is related to north at
+        0 degrees.
+    Args:
+        direction_angle (float | np.ndarray):
+            The angle to north in degrees (+Ve is interpreted as clockwise from north at 0.0
+            degrees), or an array-like (such as a numpy array or pandas Series) of angles, in
+            which NaN values are treated as missing.
+        directions (int):
+            The number of cardinal directions into which angles shall be binned (This value should
+            be one of 4, 8, 16 or 32, and is centred about "north").
+    Returns:
+        str | pd.Categorical | pd.Series:
+            The cardinal direction the angle represents. For an array-like of angles, a
+            pd.Categorical of the cardinal directions (with all directions as its categories, in
+            clockwise order), or a categorical pd.Series with the same index for a pd.Series.
+    """
 
-    return lookup[cardinal_direction]
+    if directions not in CARDINAL_DIRECTIONS:
+        raise ValueError(
+            f'The input "directions" must be one of {list(CARDINAL_DIRECTIONS.keys())}.'
+        )
 
-def angle_from_north(vector: list[float]) -> float:
+    labels = CARDINAL_DIRECTIONS[directions]
+
+    if np.ndim(direction_angle) == 0:
+        if direction_angle > 360 or direction_angle < 0:
+            raise ValueError(
+                "The angle entered is beyond the normally expected range for an orientation in degrees."
+            )
+        return labels[int((direction_angle / (360 / directions)) + 0.5) % directions]
+
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    angles = np.asarray(direction_angle, dtype=float)
+    missing = np.isnan(angles)
+    if ((angles > 360) | (angles < 0)).any():
+        raise ValueError(
+            "The angle entered is beyond the normally expected range for an orientation in degrees."
+        )
+
+    # the same arithmetic as for a single angle, truncation being floor for positive values
+    codes = (np.where(missing, 0, angles) / (360 / directions) + 0.5).astype(np.int64) % directions
+    codes[missing] = -1
+    categorical = pd.Categorical.from_codes(codes, categories=labels)
+
+    if isinstance(direction_angle, pd.Series):
+        return pd.Series(categorical, index=direction_angle.index, name=direction_angle.name)
+    return categorical
+
+# the angle of each of the 32 cardinal directions, clockwise from north
+_CARDINAL_ANGLES = dict(zip(CARDINAL_DIRECTIONS[32], np.arange(0, 360, 11.25)))
+
+@bhom_analytics(aggregate=True)
+def angle_from_cardinal(cardinal_direction: str | np.ndarray) -> float | np.ndarray:
+    """
+    For a given cardinal direction, return the corresponding angle in degrees.
+
+    Args:
+        cardinal_direction (str | np.ndarray):
+            The cardinal direction, or an array-like (such as a numpy array, pd.Categorical or
+            pandas Series) of cardinal directions.
+    Returns:
+        float | np.ndarray | pd.Series:
+            The angle associated with the cardinal direction, or an array of angles for an
+            array-like of directions (a pd.Series with the same index for a pd.Series).
+    """
+    if isinstance(cardinal_direction, str):
+        if cardinal_direction not in _CARDINAL_ANGLES:
+            raise ValueError(f"{cardinal_direction} is not a known cardinal_direction.")
+        return _CARDINAL_ANGLES[cardinal_direction]
+
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    # look up each distinct direction once, then expand back to the full array
+    codes, directions = pd.factorize(np.asarray(cardinal_direction, dtype=object))
+    unknown = [i for i in directions if i not in _CARDINAL_ANGLES]
+    if unknown:
+        raise ValueError(f"{unknown[0]} is not a known cardinal_direction.")
+    if (codes < 0).any():
+        raise ValueError("The cardinal directions must not contain missing values.")
+    angles = np.array([_CARDINAL_ANGLES[i] for i in directions], dtype=float)[codes]
+
+    if isinstance(cardinal_direction, pd.Series):
+        return pd.Series(angles, index=cardinal_direction.index, name=cardinal_direction.name)
+    return angles
+
+def angle_from_north(vector: list[float] | np.ndarray) -> float | np.ndarray:
     """For an X, Y vector, determine the clockwise angle to north at [0, 1].
 
     Args:
-        vector (list[float]):
-            A vector of length 2.
+        vector (list[float] | np.ndarray):
+            A vector of length 2, or an (N, 2) array of vectors.
 
     Returns:
-        float:
-            The angle between vector and north in degrees clockwise from [0, 1].
+        float | np.ndarray:
+            The angle between vector and north in degrees clockwise from [0, 1], or an array of
+            N angles for an (N, 2) array of vectors.
     """
     north = [0, 1]
+    vector = np.asarray(vector, dtype=float)
     angle1 = np.arctan2(*north[::-1])
-    angle2 = np.arctan2(*vector[::-1])
+    angle2 = np.arctan2(vector[..., 1], vector[..., 0])
     return np.rad2deg((angle1 - angle2) % (2 * np.pi))
 
-def angle_to_vector(clockwise_angle_from_north: float) -> list[float]:
+def angle_to_vector(clockwise_angle_from_north: float | np.ndarray) -> list[float] | np.ndarray:
     """Return the X, Y vector from of an angle from north at 0-degrees.
 
     Args:
-        clockwise_angle_from_north (float):
+        clockwise_angle_from_north (float | np.ndarray):
             The angle from north in degrees clockwise from [0, 360], though
-            any number can be input here for angles greater than a full circle.
+            any number can be input here for angles greater than a full circle, or
+            an array-like of N angles.
 
     Returns:
-        list[float]:
-            A vector of length 2.
+        list[float] | np.ndarray:
+            A vector of length 2, or an (N, 2) array of vectors for an array-like of angles.
     """
 
     clockwise_angle_from_north = np.radians(clockwise_angle_from_north)
 
-    return np.sin(clockwise_angle_from_north), np.cos(clockwise_angle_from_north)
+    if np.ndim(clockwise_angle_from_north) == 0:
+        return np.sin(clockwise_angle_from_north), np.cos(clockwise_angle_from_north)
+
+    angles = np.asarray(clockwise_angle_from_north, dtype=float)
+    return np.stack([np.sin(angles), np.cos(angles)], axis=-1)
@@ -13,55 +13,205 @@ class DecayMethod(Enum):
     PARABOLIC = auto()
     SIGMOID = auto()
 
-@bhom_analytics()
+def _linear_decay(distance: np.ndarray) -> None:
+    np.subtract(1, distance, out=distance)
+
+def _parabolic_decay(distance: np.ndarray) -> None:
+    np.square(distance, out=distance)
+    np.subtract(1, distance, out=distance)
+
+def _sigmoid_decay(distance: np.ndarray) -> None:
+    np.multiply(distance, np.pi, out=distance)
+    np.subtract(distance, np.pi / 2, out=distance)
+    np.sin(distance, out=distance)
+    np.add(distance, 1, out=distance)
+    np.multiply(distance, 0.5, out=distance)
+    np.subtract(1, distance, out=distance)
+
+# the decay profile of each method, converting normalised distances (0 at the value, 1 at the
+# maximum distance) to the proportion of the value remaining, in place
+_DECAY_KERNELS = {
+    DecayMethod.LINEAR: _linear_decay,
+    DecayMethod.PARABOLIC: _parabolic_decay,
+    DecayMethod.SIGMOID: _sigmoid_decay,
+}
+
+@bhom_analytics(aggregate=True)
 def proximity_decay(
-    value: float,
-    distance_to_value: float,
-    max_distance: float,
+    value: float | np.ndarray,
+    distance_to_value: float | np.ndarray,
+    max_distance: float | np.ndarray,
     decay_method: DecayMethod = DecayMethod.LINEAR,
-) -> float:
+) -> float | np.ndarray:
     """Calculate the "decayed" value based on proximity (up to a maximum distance).
 
     Args:
-        value (float):
+        value (float | np.ndarray):
             The value to be distributed.
-        distance_to_value (float):
+        distance_to_value (float | np.ndarray):
             A distance at which to return the magnitude.
-        max_distance (float):
+        max_distance (float | np.ndarray):
             The maximum distance to which magnitude is to be distributed. Beyond this, the input
             value is 0.
         decay_method (DecayMethod, optional):
             A type of distribution (the shape of the distribution profile). Defaults to "DecayMethod.LINEAR".
 
     Returns:
-        float:
-            The value at the given distance.
+        float | np.ndarray:
+            The value at the given distance. Arrays of values, distances and maximum distances
+            are broadcast against each other, returning an array of the broadcast shape (for
+            example, the decayed value at every point of a grid of distances).
     """
 
-    distance_to_value = np.interp(distance_to_value, [0, max_distance], [0, 1])
+    kernel = _DECAY_KERNELS.get(decay_method)
+    if kernel is None:
+        raise ValueError(f"Unknown curve type: {decay_method}")
+
+    return _decay(value, distance_to_value, max_distance, kernel)[()]
+
+def _decay(value: np.ndarray, distance_to_value: np.ndarray, max_distance: np.ndarray, kernel) -> np.ndarray:
+    value = np.asarray(value, dtype=float)
+    distance_to_value = np.asarray(distance_to_value, dtype=float)
+    max_distance = np.asarray(max_distance, dtype=float)
+
+    # normalise distances to [0, 1] of the maximum distance, in a single preallocated array
+    decayed = np.empty(np.broadcast_shapes(value.shape, distance_to_value.shape, max_distance.shape))
+    np.divide(distance_to_value, max_distance, out=decayed)
+    np.clip(decayed, 0, 1, out=decayed)
+
+    kernel(decayed)
+    np.multiply(decayed, value, out=decayed)
+
+    return decayed
+
+@bhom_analytics()
+def decay_field(
+    sources: np.ndarray,
+    values: float | np.ndarray,
+    grid_xy: np.ndarray,
+    max_distance: float | np.ndarray,
+    decay_method: DecayMethod = DecayMethod.LINEAR,
+    chunk_size: int = 100_000,
+) -> np.ndarray:
+    """Calculate the sum of the "decayed" values of many point sources at each point of a grid.
+
+    Sources are binned into a uniform grid of cells as wide as the largest maximum distance, so
+    only the sources in the cells neighbouring each grid point are decayed, and the cost depends
+    on the number of source and grid point pairs within range rather than on the number of
+    sources multiplied by the number of grid points.
+
+    Args:
+        sources (np.ndarray):
+            The X, Y locations of the sources, as an (N, 2) array.
+        values (float | np.ndarray):
+            The value distributed by each source, or an array of N values.
+        grid_xy (np.ndarray):
+            The X, Y locations at which to sum the decayed values, as an array of shape (..., 2),
+            for example (M, 2) or the (H, W, 2) stack of a meshgrid.
+        max_distance (float | np.ndarray):
+            The maximum distance to which the value of each source is distributed, or an array of
+            N maximum distances.
+        decay_method (DecayMethod, optional):
+            A type of distribution (the shape of the distribution profile). Defaults to "DecayMethod.LINEAR".
+        chunk_size (int, optional):
+            The number of grid points processed at a time, limiting the memory used. Defaults to 100,000.
+
+    Returns:
+        np.ndarray:
+            The sum of the decayed values at each grid point, in the shape of grid_xy without its
+            last dimension.
+    """
+
+    kernel = _DECAY_KERNELS.get(decay_method)
+    if kernel is None:
+        raise ValueError(f"Unknown curve type: {decay_method}")
+
+    sources = np.asarray(sources, dtype=float)
+    if sources.ndim != 2 or sources.shape[1] != 2:
+        raise ValueError(f"sources must be an (N, 2) array of X, Y locations, not an array of shape {sources.shape}.")
+    grid_xy = np.asarray(grid_xy, dtype=float)
+    if grid_xy.ndim == 0 or grid_xy.shape[-1] != 2:
+        raise ValueError(f"grid_xy must be an array of X, Y locations, with a last dimension of length 2, not an array of shape {grid_xy.shape}.")
+    points = grid_xy.reshape(-1, 2)
+    values = np.broadcast_to(np.asarray(values, dtype=float), (len(sources),))
+    max_distance = np.broadcast_to(np.asarray(max_distance, dtype=float), (len(sources),))
+    if (max_distance <= 0).any():
+        raise ValueError("max_distance must be greater than 0.")
+
+    field = np.zeros(len(points))
+    if len(sources) == 0 or len(points) == 0:
+        return field.reshape(grid_xy.shape[:-1])
+
+    # bin the sources into cells as wide as the largest maximum distance, sorted by cell
+    cell_size = max_distance.max()
+    origin = sources.min(axis=0)
+    source_cells = np.floor((sources - origin) / cell_size).astype(np.int64)
+    n_x, n_y = source_cells.max(axis=0) + 1
+    source_keys = source_cells[:, 0] * n_y + source_cells[:, 1]
+    order = np.argsort(source_keys, kind="stable")
+    sources, values, max_distance, source_keys = sources[order], values[order], max_distance[order], source_keys[order]
+
+    for chunk_start in range(0, len(points), chunk_size):
+        chunk = points[chunk_start:chunk_start + chunk_size]
+        cells = np.floor((chunk - origin) / cell_size).astype(np.int64)
+
+        for d_x in (-1, 0, 1):
+            for d_y in (-1, 0, 1):
+                c_x, c_y = cells[:, 0] + d_x, cells[:, 1] + d_y
+                inside = (c_x >= 0) & (c_x < n_x) & (c_y >= 0) & (c_y < n_y)
+                point_index = np.flatnonzero(inside)
+                keys = c_x[inside] * n_y + c_y[inside]
+                start = np.searchsorted(source_keys, keys, side="left")
+                counts = np.searchsorted(source_keys, keys, side="right") - start
+                if not counts.any():
+                    continue
+
+                # expand to a pair for each grid point and each source in the neighbouring cell
+                pair_points = np.repeat(point_index, counts)
+                pair_sources = np.repeat(start - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+                distances = np.hypot(*(chunk[pair_points] - sources[pair_sources]).T)
+                in_range = distances < max_distance[pair_sources]
+                pair_points, pair_sources = pair_points[in_range], pair_sources[in_range]
+
+                decayed = _decay(values[pair_sources], distances[in_range], max_distance[pair_sources], kernel)
+                field[chunk_start:chunk_start + len(chunk)] += np.bincount(pair_points, weights=decayed, minlength=len(chunk))
 
-    if decay_method == DecayMethod.LINEAR:
-        return (1 - distance_to_value) * value
-    if decay_method == DecayMethod.PARABOLIC:
-        return (-(distance_to_value**2) + 1) * value
-    if decay_method == DecayMethod.SIGMOID:
-        return (1 - (0.5 * (np.sin(distance_to_value * np.pi - np.pi / 2) + 1))) * value
+    return field.reshape(grid_xy.shape[:-1])
 
-    raise ValueError(f"Unknown curve type: {decay_method}")
+@bhom_analytics(aggregate=True)
+def transition_mask(transition_index: np.ndarray, transition_window: int) -> np.ndarray:
+    """Find the values within a window after each "transition", as used by decay_rate_smoother.
+
+    Args:
+        transition_index (np.ndarray):
+            A 1D boolean array of whether each value is a transition, or a 2D array with a column
+            per series.
+        transition_window (int):
+            The number of values, from each transition (and from the start), to include.
+
+    Returns:
+        np.ndarray:
+            A boolean array of the same shape, True for values fewer than transition_window values
+            after the last transition (or the start).
+    """
+    transition_index = np.asarray(transition_index, dtype=bool)
+    positions = np.arange(len(transition_index)).reshape((-1,) + (1,) * (transition_index.ndim - 1))
+    last_transition = np.maximum.accumulate(np.where(transition_index, positions, 0), axis=0)
+    return (positions - last_transition) < transition_window
 
 @bhom_analytics()
 def decay_rate_smoother(
-    series: pd.Series,
+    series: pd.Series | pd.DataFrame,
     difference_threshold: float = -10,
     transition_window: int = 4,
     ewm_span: float = 1.25,
-) -> pd.Series:
+) -> pd.Series | pd.DataFrame:
     """Helper function that adds a decay rate to a time-series for values dropping significantly
         below the previous values.
 
     Args:
-        series (pd.Series):
-            The series to modify
+        series (pd.Series | pd.DataFrame):
+            The series to modify, or a DataFrame in which to modify every column.
         difference_threshold (float, optional):
             The difference between current/previous values which class as a "transition".
             Defaults to -10.
@@ -72,29 +222,115 @@ def decay_rate_smoother(
             The rate of decay. Defaults to 1.25.
 
     Returns:
-        pd.Series:
-            A modified series
+        pd.Series | pd.DataFrame:
+            A modified series, or a DataFrame of modified columns.
     """
 
     # Find periods of major transition (where values vary significantly)
     transition_index = series.diff() < difference_threshold
 
     # Get boolean index for all periods within window from the transition indices
-    ewm_mask = []
-    n = 0
-    for i in transition_index:
-        if i:
-            n = 0
-        if n < transition_window:
-            ewm_mask.append(True)
-        else:
-            ewm_mask.append(False)
-        n += 1
+    ewm_mask = transition_mask(transition_index.to_numpy(), transition_window)
 
     # Run an EWM to get the smoothed values following changes to values
-    ewm_smoothed: pd.Series = series.ewm(span=ewm_span).mean()
+    ewm_smoothed: pd.Series | pd.DataFrame = series.ewm(span=ewm_span).mean()
 
     # Choose from ewm or original values based on ewm mask
     new_series = ewm_smoothed.where(ewm_mask, series)
 
     return new_series
+
+class DecayRateSmoother():
+    """A decay_rate_smoother for data received in chunks, such as live sensor readings.
+
+    The state needed to continue smoothing (the exponentially weighted mean, the last value and
+    the number of values since the last transition) is kept between calls to update(), so each
+    update processes only the new chunk, and the concatenated output of all updates matches a
+    single call to decay_rate_smoother over all the data, to within floating point rounding.
+
+    Args:
+        difference_threshold (float, optional):
+            The difference between current/previous values which class as a "transition".
+            Defaults to -10.
+        transition_window (int, optional):
+            The number of values after the "transition" within which an exponentially weighted mean
+             should be applied. Defaults to 4.
+        ewm_span (float, optional):
+            The rate of decay. Defaults to 1.25.
+    """
+
+    def __init__(self, difference_threshold: float = -10, transition_window: int = 4, ewm_span: float = 1.25):
+        if ewm_span < 1:
+            raise ValueError("ewm_span must be at least 1.")
+        self.difference_threshold = difference_threshold
+        self.transition_window = transition_window
+        self.ewm_span = ewm_span
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the data smoothed so far, to start smoothing a new series."""
+        self._columns = None
+        self._last_value = None
+        self._since_transition = None
+        self._weighted = None
+        self._old_wt = None
+
+    @bhom_analytics(aggregate=True)
+    def update(self, chunk: pd.Series | pd.DataFrame) -> pd.Series | pd.DataFrame:
+        """Smooth the next chunk of the series.
+
+        Args:
+            chunk (pd.Series | pd.DataFrame):
+                The values following those of the previous update, with the same columns for a
+                DataFrame.
+
+        Returns:
+            pd.Series | pd.DataFrame:
+                The smoothed chunk, as decay_rate_smoother would return it for these values.
+        """
+
+        columns = chunk.columns if isinstance(chunk, pd.DataFrame) else None
+        values = chunk.to_numpy(dtype=float).reshape(len(chunk), 1 if columns is None else len(columns))
+        if self._last_value is None:
+            n_columns = values.shape[1]
+            self._columns = columns
+            self._last_value = np.full(n_columns, np.nan)
+            self._since_transition = np.zeros(n_columns, dtype=np.int64)
+            self._weighted = np.full(n_columns, np.nan)
+            self._old_wt = np.zeros(n_columns)
+        elif (columns is None) != (self._columns is None) or (columns is not None and not columns.equals(self._columns)):
+            raise ValueError("Each chunk must have the same columns as the first.")
+        if len(chunk) == 0:
+            return chunk.astype(float)
+
+        # transitions, continuing the difference and the count since the last transition
+        transition_index = np.diff(values, axis=0, prepend=self._last_value[np.newaxis]) < self.difference_threshold
+        positions = np.arange(len(values))[:, np.newaxis] + self._since_transition
+        last_transition = np.maximum.accumulate(np.where(transition_index, positions, 0), axis=0)
+        since_transition = positions - last_transition
+        ewm_mask = since_transition < self.transition_window
+
+        # the adjusted exponentially weighted mean of the chunk alone is sum(w * x) / sum(w), with
+        # both sums from pandas, and the state carried from previous chunks adds old_wt * weighted
+        # and old_wt to them, decaying by the smoothing factor at each value
+        missing = np.isnan(values)
+        weighted_sum = np.nan_to_num(pd.DataFrame(values).ewm(span=self.ewm_span).sum().to_numpy())
+        weights = pd.DataFrame(~missing, dtype=float).ewm(span=self.ewm_span).sum().to_numpy()
+        old_wt = self._old_wt * (1.0 - 2.0 / (self.ewm_span + 1.0)) ** np.arange(1, len(values) + 1)[:, np.newaxis]
+        with np.errstate(invalid="ignore"):
+            smoothed = (old_wt * np.nan_to_num(self._weighted) + weighted_sum) / (old_wt + weights)
+
+        # missing values keep the previous mean (which the sums above lose once their weights
+        # underflow), seeded with the mean carried from the previous chunk
+        smoothed[missing] = np.nan
+        smoothed = pd.DataFrame(np.vstack([self._weighted, smoothed])).ffill().to_numpy()[1:]
+        self._weighted = smoothed[-1]
+        self._old_wt = old_wt[-1] + weights[-1]
+
+        self._last_value = values[-1]
+        self._since_transition = since_transition[-1] + 1
+
+        smoothed = np.where(ewm_mask, smoothed, values)
+        if columns is None:
+            return pd.Series(smoothed[:, 0], index=chunk.index, name=chunk.name)
+        return pd.DataFrame(smoothed, index=chunk.index, columns=columns)
@@ -6,6 +6,7 @@ import pandas as pd
 from caseconverter import snakecase
 
 from ..bhom.analytics import bhom_analytics
+from .decay_rate import transition_mask
 
 def sanitise_string(string: str) -> str:
     """Sanitise a string so that only path-safe characters remain."""
@@ -27,7 +28,7 @@ def convert_keys_to_snake_case(d: dict | list | Any):
 
     return d
 
-@bhom_analytics()
+@bhom_analytics(aggregate=True)
 def timedelta_tostring(time_delta: timedelta) -> str:
     """timedelta objects don't have a nice string representation, so this function converts them.
 
@@ -45,17 +46,17 @@ def timedelta_tostring(time_delta: timedelta) -> str:
 
 @bhom_analytics()
 def decay_rate_smoother(
-    series: pd.Series,
+    series: pd.Series | pd.DataFrame,
     difference_threshold: float = -10,
     transition_window: int = 4,
     ewm_span: float = 1.25,
-) -> pd.Series:
+) -> pd.Series | pd.DataFrame:
     """Helper function that adds a decay rate to a time-series for values dropping significantly
         below the previous values.
 
     Args:
-        series (pd.Series):
-            The series to modify
+        series (pd.Series | pd.DataFrame):
+            The series to modify, or a DataFrame in which to modify every column.
         difference_threshold (float, optional):
             The difference between current/previous values which class as a "transition".
             Defaults to -10.
@@ -66,27 +67,18 @@ def decay_rate_smoother(
             The rate of decay. Defaults to 1.25.
 
     Returns:
-        pd.Series:
-            A modified series
+        pd.Series | pd.DataFrame:
+            A modified series, or a DataFrame of modified columns.
     """
 
     # Find periods of major transition (where values vary significantly)
     transition_index = series.diff() < difference_threshold
 
     # Get boolean index for all periods within window from the transition indices
-    ewm_mask = []
-    n = 0
-    for i in transition_index:
-        if i:
-            n = 0
-        if n < transition_window:
-            ewm_mask.append(True)
-        else:
-            ewm_mask.append(False)
-        n += 1
+    ewm_mask = transition_mask(transition_index.to_numpy(), transition_window)
 
     # Run an EWM to get the smoothed values following changes to values
-    ewm_smoothed: pd.Series = series.ewm(span=ewm_span).mean()
+    ewm_smoothed: pd.Series | pd.DataFrame = series.ewm(span=ewm_span).mean()
 
     # Choose from ewm or original values based on ewm mask
     new_series = ewm_smoothed.where(ewm_mask, series)
@@ -1,4 +1,5 @@
 ﻿from typing import Any
+import numpy as np
 import pandas as pd
 
 from ..bhom.analytics import bhom_analytics
@@ -46,24 +47,92 @@ def validate_timeseries(
             raise ValueError("series is not contiguous")
 
 
+# meteorological seasons, in the order of their grouping keys
+SEASONS = ("DJF", "MAM", "JJA", "SON")
+
+def _period_keys(index: pd.DatetimeIndex, period: str | Any) -> tuple[np.ndarray, Any, str]:
+    """Get the key of each timestep for a period, its display labels and the period name."""
+    if not isinstance(period, str):
+        keys = np.asarray(period)
+        if keys.shape != (len(index),):
+            raise ValueError("Grouping keys must have one key per timestep.")
+        return keys, None, getattr(period, "name", None)
+
+    name = "".join(i.title() for i in period.split("_"))
+    if period == "season":
+        return np.asarray(index.month) % 12 // 3, np.array(SEASONS), name
+    if not hasattr(index, period):
+        raise ValueError(f'"{period}" is not a period of a DatetimeIndex, such as "month", "hour", "day_of_week" or "season".')
+    return np.asarray(getattr(index, period)), None, name
+
 @bhom_analytics()
-def timeseries_summary_monthly(series: pd.Series, bins: list[float], bin_names: list[str] = None, density: bool = False):
-    if not isinstance(series, pd.Series):
+def timeseries_summary(
+    obj: pd.Series | pd.DataFrame,
+    bins: list[float],
+    bin_names: list[str] = None,
+    density: bool = False,
+    period: str | Any = "month",
+) -> pd.DataFrame:
+    """Count the values of a time-series in each bin, for each period (such as each month).
+
+    Args:
+        obj (pd.Series | pd.DataFrame):
+            The time-series to summarise, or a DataFrame in which to summarise every column.
+        bins (list[float]):
+            The edges of the bins, as for pd.cut with include_lowest=True.
+        bin_names (list[str], optional):
+            The names of the bins. Defaults to None, which names the bins by their intervals.
+        density (bool, optional):
+            If True, return the proportion of each period's values in each bin rather than counts.
+            Defaults to False.
+        period (str | Any, optional):
+            The period to group by, as an attribute of a DatetimeIndex (such as "month", "hour"
+            or "day_of_week"), "season" for meteorological seasons, or an array-like of a
+            grouping key for each timestep. Defaults to "month".
+
+    Returns:
+        pd.DataFrame:
+            The counts (or proportions) with a row per period present and a column per bin, or
+            a column per (column, bin) for a DataFrame.
+    """
+    if not isinstance(obj, (pd.Series, pd.DataFrame)):
         raise ValueError("The series must be a pandas series.")
 
-    if not isinstance(series.index, pd.DatetimeIndex):
+    if not isinstance(obj.index, pd.DatetimeIndex):
         raise ValueError("The series must have a time series.")
 
-    df = pd.cut(series, bins=bins, labels=bin_names, include_lowest=True)
+    # the categories pd.cut would assign, including the widened lowest interval
+    categories = pd.cut(np.array([], dtype=float), bins=bins, labels=bin_names, include_lowest=True).categories
+    bins = np.asarray(bins, dtype=float)
+    n_bins = len(bins) - 1
 
-    if df.isna().any():
+    values = obj.to_numpy(dtype=float).reshape(len(obj), -1 if isinstance(obj, pd.DataFrame) else 1)
+    codes = np.digitize(values, bins, right=True) - 1
+    codes[values == bins[0]] = 0
+    if ((codes < 0) | (codes >= n_bins)).any():
         raise ValueError(
             f"The input value/s are outside the range of the given bins ({bins[0]} <= x <= {bins[-1]})."
         )
-    
-    counts = df.groupby(series.index.month).value_counts().unstack().sort_index(axis=0)
-    counts.columns.name = None
-    counts.index.name = "Month"
+
+    keys, period_labels, period_name = _period_keys(obj.index, period)
+    period_codes, periods = pd.factorize(keys, sort=True)
+    n_periods, n_columns = len(periods), values.shape[1]
+
+    # a single bincount over (column, period, bin)
+    flat = (np.arange(n_columns) * n_periods + period_codes[:, np.newaxis]) * n_bins + codes
+    counts = np.bincount(flat.ravel(), minlength=n_columns * n_periods * n_bins).reshape(n_columns, n_periods, n_bins)
+
     if density:
-        return counts.div(counts.sum(axis=1), axis=0)
-    return counts
\ No newline at end of file
+        counts = counts / counts.sum(axis=2, keepdims=True)
+
+    index = pd.Index(periods if period_labels is None else period_labels[periods], name=period_name)
+    columns = pd.CategoricalIndex(categories, categories=categories, ordered=True)
+    if isinstance(obj, pd.Series):
+        return pd.DataFrame(counts[0], index=index, columns=columns)
+    columns = pd.MultiIndex.from_product([obj.columns, columns])
+    return pd.DataFrame(counts.transpose(1, 0, 2).reshape(n_periods, -1), index=index, columns=columns)
+
+@bhom_analytics()
+def timeseries_summary_monthly(series: pd.Series | pd.DataFrame, bins: list[float], bin_names: list[str] = None, density: bool = False) -> pd.DataFrame:
+    """Count the values of a time-series in each bin, for each month. See timeseries_summary."""
+    return timeseries_summary(series, bins, bin_names=bin_names, density=density, period="month")
@@ -0,0 +1,819 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import pstats
+import socket
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from python_toolkit.bhom import analytics, profiling, tracing
+from python_toolkit.bhom.collector import UsageCollector
+from python_toolkit.bhom.analytics import (
+    IncrementalUsageSummariser,
+    UsageLogBatch,
+    UsageLogEntry,
+    UsageLogReader,
+    bhom_analytics,
+    compact_usage_logs,
+    load_logs_from_file,
+    merge_log_shards,
+    query_usage_archive,
+    set_enabled,
+    summarise_durations,
+    summarise_usage_logs,
+)
+from python_toolkit.bhom.logging.file import AppendingRotatingFileHandler
+from python_toolkit.bhom.logging.writer import AnalyticsWriter
+from python_toolkit.bhom.util import (
+    bson_unix_ticks,
+    bson_unix_ticks_array,
+    bson_unix_ticks_to_datetime,
+    bson_unix_ticks_to_datetime_array,
+)
+
+
+class _CapturingWriter:
+    """Stand-in for ANALYTICS_WRITER that keeps submitted entries in memory."""
+
+    def __init__(self):
+        self.entries = []
+
+    def submit(self, log_file, entry):
+        self.entries.append(entry)
+        return True
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    writer = _CapturingWriter()
+    monkeypatch.setattr(analytics, "ANALYTICS_WRITER", writer)
+    return writer.entries
+
+
+@pytest.fixture
+def record_calls(captured):
+    """Call decorated functions, returning the usage entries recorded for the calls."""
+
+    @bhom_analytics()
+    def add(a: float, b: float) -> float:
+        return a + b
+
+    @bhom_analytics()
+    def subtract(a: float, b: float) -> float:
+        return a - b
+
+    functions = {"add": add, "subtract": subtract}
+
+    def _record(n: int = 1, callers=("add",), projects=(None,)) -> list:
+        start = len(captured)
+        for project in projects:
+            analytics.set_project_number(project)
+            for i in range(n):
+                for caller in callers:
+                    functions[caller](i, 1)
+        analytics.set_project_number(None)
+        return captured[start:]
+
+    return _record
+
+
+def _log_lines(entries) -> list:
+    """The lines a usage log holds for the given entries."""
+    return [json.dumps(i, default=str) for i in entries]
+
+
+def _logger(name: str, handler: logging.Handler) -> logging.Logger:
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.handlers = [handler]
+    return logger
+
+
+def _file_logger(name: str, path) -> logging.Logger:
+    return _logger(name, logging.FileHandler(str(path), encoding="utf-8", delay=True))
+
+
+def test_analytics_writer_batches(tmp_path):
+    """_"""
+    log_file = tmp_path / "usage.log"
+    writer = AnalyticsWriter(logger=_file_logger("test_writer_batches", log_file), batch_size=7)
+    for i in range(20):
+        assert writer.submit(str(log_file), {"CallerName": f"func_{i}"})
+    writer.flush()
+    writer.close()
+
+    lines = log_file.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["CallerName"] for line in lines] == [f"func_{i}" for i in range(20)]
+
+
+class _BlockingHandler(logging.Handler):
+    """A handler that keeps the lines it receives, waiting for `proceed` before each batch."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.baseFilename = str(path)
+        self.proceed = threading.Event()
+        self.waiting = threading.Event()
+        self.lines = []
+
+    def emit(self, record):
+        self.waiting.set()
+        self.proceed.wait(5)
+        self.lines.extend(record.getMessage().split("\n"))
+
+
+def _blocking_logger(name: str, path) -> logging.Logger:
+    return _logger(name, _BlockingHandler(path))
+
+
+def test_analytics_writer_drop_policy(tmp_path):
+    """_"""
+    logger = _blocking_logger("test_writer_drop", tmp_path / "usage.log")
+    handler = logger.handlers[0]
+    writer = AnalyticsWriter(logger=logger, max_queue_size=2, batch_size=1, flush_interval=0)
+    results = [writer.submit(handler.baseFilename, {"i": i}) for i in range(10)]
+    handler.proceed.set()
+    writer.close()
+
+    assert not all(results)
+    assert writer.dropped == results.count(False)
+    assert len(handler.lines) == results.count(True)
+
+
+def test_analytics_writer_block_policy(tmp_path):
+    """_"""
+    logger = _blocking_logger("test_writer_block", tmp_path / "usage.log")
+    handler = logger.handlers[0]
+    writer = AnalyticsWriter(logger=logger, max_queue_size=2, batch_size=1, flush_interval=0.05, policy="block")
+
+    submitter = threading.Thread(target=lambda: [writer.submit(handler.baseFilename, {"i": i}) for i in range(10)])
+    submitter.start()
+    assert handler.waiting.wait(5)
+
+    # the caller waits for the writer to make room, rather than dropping entries
+    submitter.join(0.2)
+    assert submitter.is_alive()
+    handler.proceed.set()
+    submitter.join(5)
+    writer.close()
+
+    assert not submitter.is_alive()
+    assert writer.dropped == 0
+    assert [json.loads(i)["i"] for i in handler.lines] == list(range(10))
+
+
+def test_analytics_writer_flush_race(tmp_path):
+    """_"""
+    log_file = tmp_path / "usage.log"
+    writer = AnalyticsWriter(logger=_file_logger("test_writer_flush_race", log_file), batch_size=3, flush_interval=0.001)
+
+    def _submit(thread_index):
+        for i in range(200):
+            writer.submit(str(log_file), {"thread": thread_index, "i": i})
+            if i % 50 == 0:
+                writer.flush()
+
+    threads = [threading.Thread(target=_submit, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # entries queued before a flush are written by the time it returns, once and in order
+    writer.flush()
+    entries = [json.loads(i) for i in log_file.read_text(encoding="utf-8").splitlines()]
+    writer.close()
+    assert len(entries) == 800
+    for thread_index in range(4):
+        assert [i["i"] for i in entries if i["thread"] == thread_index] == list(range(200))
+
+
+def test_analytics_writer_close_while_blocked(tmp_path):
+    """_"""
+    logger = _blocking_logger("test_writer_close_blocked", tmp_path / "usage.log")
+    handler = logger.handlers[0]
+    writer = AnalyticsWriter(logger=logger, max_queue_size=1, batch_size=1, flush_interval=0.05, policy="block")
+
+    writer.submit(handler.baseFilename, {"i": 0})
+    assert handler.waiting.wait(5)
+    writer.submit(handler.baseFilename, {"i": 1})
+    submitter = threading.Thread(target=writer.submit, args=(handler.baseFilename, {"i": 2}))
+    submitter.start()
+
+    # closing while the caller waits for room stops the wait, and every entry is still written
+    closer = threading.Thread(target=writer.close, kwargs={"timeout": 0.1})
+    closer.start()
+    closer.join(0.3)
+    handler.proceed.set()
+    closer.join(5)
+    submitter.join(5)
+    writer.flush()
+
+    assert not submitter.is_alive() and not closer.is_alive()
+    assert sorted(json.loads(i)["i"] for i in handler.lines) == [0, 1, 2]
+    writer.close()
+
+
+@bhom_analytics()
+def _forked_work(i: int) -> int:
+    return i * 2
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_analytics_writer_fork_pool(tmp_path, monkeypatch):
+    """_"""
+    # a long flush interval, so entries are still queued when the workers exit
+    writer = AnalyticsWriter(logger=_file_logger("test_writer_fork_pool", tmp_path / "parent.log"), flush_interval=60)
+    monkeypatch.setattr(analytics, "ANALYTICS_WRITER", writer)
+    monkeypatch.setattr(analytics, "BHOM_LOG_FOLDER", tmp_path)
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("fork")) as pool:
+        assert list(pool.map(_forked_work, range(50))) == [i * 2 for i in range(50)]
+
+    shards = list(tmp_path.glob("Usage_*.log"))
+    assert shards and all(str(os.getpid()) not in shard.name for shard in shards)
+    lines = [line for shard in shards for line in shard.read_text(encoding="utf-8").splitlines()]
+    assert [json.loads(line)["CallerName"] for line in lines] == ["_forked_work"] * 50
+
+
+def test_analytics_writer_policy():
+    """_"""
+    with pytest.raises(ValueError):
+        AnalyticsWriter(policy="wait")
+    with pytest.raises(ValueError):
+        AnalyticsWriter(collector="tcp://127.0.0.1:80")
+
+
+@pytest.mark.parametrize("address", ["udp://127.0.0.1:0", "unix"])
+def test_usage_collector(tmp_path, record_calls, address):
+    """_"""
+    if address == "unix":
+        if not hasattr(socket, "AF_UNIX"):
+            pytest.skip("Unix domain sockets are not supported on this platform.")
+        address = f"unix://{tmp_path / 'collector.sock'}"
+
+    entries = record_calls(200)
+    collector = UsageCollector(address, tmp_path / "collected", flush_interval=0.1)
+    thread = threading.Thread(target=collector.serve, daemon=True)
+    thread.start()
+
+    log_file = tmp_path / "usage.log"
+    writer = AnalyticsWriter(logger=_file_logger(f"test_collector_{address}", log_file), batch_size=50, collector=collector.address)
+    for entry in entries:
+        writer.submit(str(log_file), entry)
+    writer.close()
+
+    deadline = time.monotonic() + 10
+    while collector.received < 200 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    collector.stop()
+    thread.join()
+    collector.close()
+
+    assert not log_file.exists()
+    assert collector.received == 200
+    assert [i["TotalNbCals"] for i in collector.summarise()] == [200]
+    collected = json.loads(next((tmp_path / "collected").glob("Collected_*.json")).read_text())
+    assert [i["TotalNbCals"] for i in collected["summaries"]] == [200]
+
+    # a restarted collector carries on from the summaries written
+    restarted = UsageCollector(address, tmp_path / "collected")
+    restarted.add(_log_lines(entries[:1]))
+    restarted.close()
+    assert [i["TotalNbCals"] for i in restarted.summarise()] == [201]
+
+
+def test_usage_collector_summarise_twice(tmp_path, record_calls):
+    """_"""
+    entries = record_calls(2)
+    entries[0].update(Time={"$date": 1704067200000}, Errors=["day1err"])  # 2024-01-01
+    entries[1].update(Time={"$date": 1704153600000}, Errors=["day2err"])  # 2024-01-02
+
+    collector = UsageCollector("udp://127.0.0.1:0", tmp_path / "collected")
+    collector.add(_log_lines(entries))
+    collector.close()
+
+    # summarising merges copies of the summaries of each day, leaving the days unchanged
+    first = collector.summarise()
+    second = collector.summarise()
+    assert [i["Errors"] for i in first] == [i["Errors"] for i in second] == [["day1err", "day2err"]]
+    assert [i["TotalNbCals"] for i in second] == [2]
+
+    # days flushed out of memory are read back from their summary files
+    collector.flush()
+    assert not collector._summaries
+    assert collector.summarise() == second
+    collector.add(_log_lines(entries[:1]))
+    assert [i["TotalNbCals"] for i in collector.summarise()] == [3]
+
+
+@pytest.mark.parametrize("address", ["udp", "unix"])
+def test_analytics_writer_collector_fallback(tmp_path, address):
+    """_"""
+    if address == "unix":
+        if not hasattr(socket, "AF_UNIX"):
+            pytest.skip("Unix domain sockets are not supported on this platform.")
+        address = f"unix://{tmp_path / 'missing.sock'}"
+    else:
+        # a port nothing is listening on
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            address = f"udp://127.0.0.1:{sock.getsockname()[1]}"
+
+    log_file = tmp_path / "usage.log"
+    writer = AnalyticsWriter(logger=_file_logger(f"test_collector_fallback_{address}", log_file), collector=address)
+    for i in range(5):
+        writer.submit(str(log_file), {"CallerName": f"func_{i}"})
+    writer.close()
+    assert len(log_file.read_text().splitlines()) == 5
+
+
+def test_bhom_analytics_entry(captured):
+    """_"""
+
+    @bhom_analytics()
+    def add(a: float, b: float) -> float:
+        return a + b
+
+    assert add(1, 2) == 3
+    assert len(captured) == 1
+    assert captured[0]["CallerName"] == "add"
+    assert captured[0]["Errors"] == []
+
+
+def test_bhom_analytics_disabled(captured):
+    """_"""
+
+    def add(a: float, b: float) -> float:
+        return a + b
+
+    assert bhom_analytics(disable=True)(add) is add
+
+    decorated = bhom_analytics()(add)
+    set_enabled(False)
+    try:
+        assert decorated(1, 2) == 3
+        assert not captured
+    finally:
+        set_enabled(True)
+
+    assert decorated(1, 2) == 3
+    assert len(captured) == 1
+
+
+def test_bhom_analytics_aggregate(captured):
+    """_"""
+
+    @bhom_analytics(aggregate=True, aggregate_interval=3600)
+    def invert(a: float) -> float:
+        return 1 / a
+
+    for i in range(1, 101):
+        invert(i)
+    with pytest.raises(ZeroDivisionError):
+        invert(0)
+    assert not captured
+
+    # other decorated functions may have counts pending too, so only this function's are checked
+    analytics._flush_aggregators()
+    entries = [i for i in captured if i["CallerName"] == "invert"]
+    assert len(entries) == 1
+    assert entries[0]["CustomData"]["CallCount"] == 101
+    assert entries[0]["CustomData"]["ErrorCount"] == 1
+    assert len(entries[0]["Errors"]) == 1
+
+
+@bhom_analytics(aggregate=True, aggregate_interval=3600)
+def _forked_aggregate(i: int) -> int:
+    return i * 2
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_bhom_analytics_aggregate_fork_pool(tmp_path, monkeypatch):
+    """_"""
+    writer = AnalyticsWriter(logger=_file_logger("test_aggregate_fork_pool", tmp_path / "parent.log"))
+    monkeypatch.setattr(analytics, "ANALYTICS_WRITER", writer)
+    monkeypatch.setattr(analytics, "BHOM_LOG_FOLDER", tmp_path)
+    monkeypatch.setattr(analytics, "_LOG_FILES", {})
+
+    # counts pending in the parent when the workers are forked
+    for i in range(5):
+        _forked_aggregate(i)
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("fork")) as pool:
+        assert list(pool.map(_forked_aggregate, range(50))) == [i * 2 for i in range(50)]
+    analytics._flush_aggregators()
+    writer.close()
+
+    call_counts = {}
+    for shard in tmp_path.glob("Usage_*.log"):
+        for line in shard.read_text(encoding="utf-8").splitlines():
+            entry = json.loads(line)
+            if entry["CallerName"] == "_forked_aggregate":
+                parent = shard.name.endswith(f"_{os.getpid()}.log")
+                call_counts[parent] = call_counts.get(parent, 0) + entry["CustomData"]["CallCount"]
+    assert call_counts == {True: 5, False: 50}
+
+
+def test_bhom_analytics_sampling(captured):
+    """_"""
+
+    @bhom_analytics(sample_rate=0.1)
+    def sampled(a: float) -> float:
+        return a
+
+    @bhom_analytics(max_per_second=5)
+    def limited(a: float) -> float:
+        return a
+
+    for i in range(1000):
+        sampled(i)
+        limited(i)
+
+    n_sampled = sum(1 for i in captured if i["CallerName"] == "sampled")
+    n_limited = sum(1 for i in captured if i["CallerName"] == "limited")
+    assert 0 < n_sampled < 500
+    assert all(i["CustomData"]["SampleRate"] == 0.1 for i in captured if i["CallerName"] == "sampled")
+    assert 0 < n_limited < 100
+
+    with pytest.raises(ValueError):
+        bhom_analytics(sample_rate=0)
+    for max_per_second in [0, -1, float("nan")]:
+        with pytest.raises(ValueError):
+            bhom_analytics(max_per_second=max_per_second)
+
+
+def test_usage_log_reader(tmp_path, record_calls):
+    """_"""
+    lines = _log_lines(record_calls(25))
+
+    (tmp_path / "Usage_a_20240101.log").write_text("\n".join(lines[:10]) + "\n\n{not json\n", encoding="utf-8-sig")
+    (tmp_path / "Usage_b_20240101.log").write_text("\n".join(lines[10:]), encoding="utf-8")
+
+    reader = UsageLogReader(tmp_path, chunk_size=4)
+    entries = list(reader)
+    assert len(entries) == 25
+    assert reader.skipped == 1
+    assert all(i.CallerName == "add" for i in entries)
+
+    parallel = UsageLogReader(str(tmp_path / "Usage_*.log"), processes=2, chunk_size=4)
+    assert [i.BHoM_Guid for i in parallel] == [i.BHoM_Guid for i in entries]
+    assert parallel.skipped == 1
+
+    assert len(load_logs_from_file(tmp_path / "Usage_b_20240101.log")) == 15
+    with pytest.raises(FileNotFoundError):
+        load_logs_from_file(tmp_path / "Usage_c_20240101.log")
+    assert not list(UsageLogReader(str(tmp_path / "Usage_c_*.log")))
+
+
+def test_usage_log_entry(tmp_path, record_calls):
+    """_"""
+    first, second = UsageLogEntry(), UsageLogEntry()
+    assert not hasattr(first, "__dict__")
+    assert first.BHoM_Guid != second.BHoM_Guid
+    first.Errors.append("error")
+    assert second.Errors == [] and second.Time == {"$date": 0}
+
+    lines = _log_lines(record_calls(10))
+    (tmp_path / "Usage_a_20240101.log").write_text("\n".join(lines) + "\n{not json\n[1]\n", encoding="utf-8")
+
+    reader = UsageLogReader(tmp_path, chunk_size=4)
+    entries = list(reader)
+    assert entries[0].SelectedItem is entries[1].SelectedItem
+
+    batches = list(reader.batches())
+    assert [len(i) for i in batches] == [4, 4, 2] and reader.skipped == 2
+    batch = reader.read_batch()
+    assert len(batch) == 10
+    assert batch.values["CallerName"] == ["add"]
+    assert (batch.column("Time") == [i.Time["$date"] for i in entries]).all()
+    assert (batch.column("WallTimeNs") == [i.CustomData["WallTimeNs"] for i in entries]).all()
+    assert list(batch) == entries
+    assert list(UsageLogBatch.from_entries(entries)) == entries
+
+
+def test_summarise_usage_logs(record_calls):
+    """_"""
+    recorded = record_calls(callers=("add", "add", "subtract"), projects=(None, "P1", None, "P2", "P1"))
+    entries = [UsageLogEntry.from_json(i) for i in _log_lines(recorded)]
+    summary = summarise_usage_logs(iter(entries))
+
+    assert len(summary) == 6
+    assert sum(i["TotalNbCals"] for i in summary) == 15
+    assert {(i["ProjectID"], i["CallerName"]): i["TotalNbCals"] for i in summary}[("P1", "add")] == 4
+    assert all(i["StartTime"] <= i["EndTime"] for i in summary)
+
+
+def test_compact_usage_logs(tmp_path, record_calls):
+    """_"""
+    entries = record_calls(callers=("add", "subtract"), projects=("P1", "P2", "P1"))
+    for i, entry in enumerate(entries):
+        entry["Time"] = {"$date": 1704067200000 + i * 3600 * 1000}  # hourly from 2024-01-01
+    lines = _log_lines(entries)
+    (tmp_path / "Usage_python_toolkit_20240101.log").write_text("\n".join(lines), encoding="utf-8")
+    (tmp_path / f"Usage_python_toolkit_{datetime.now():%Y%m%d}.log").write_text(lines[0], encoding="utf-8")
+
+    archive_folder = tmp_path / "Archive"
+    archives = compact_usage_logs(tmp_path, archive_folder)
+    assert [i.name for i in archives] == ["Usage_python_toolkit_20240101.npz"]
+    assert not compact_usage_logs(tmp_path, archive_folder)
+
+    everything = query_usage_archive(archive_folder)
+    assert len(everything["Time"]) == 6
+    assert list(everything["BHoM_Guid"]) == [str(i["BHoM_Guid"]) for i in entries]
+    assert list(everything["WallTimeNs"]) == [i["CustomData"]["WallTimeNs"] for i in entries]
+    assert all("WallTimeNs" not in json.loads(i) for i in everything["CustomData"])
+    with np.load(archives[0]) as data:
+        assert len(data["CustomData_values"]) == 1
+
+    p1_adds = query_usage_archive(archive_folder, columns=["Time", "CallerName"], project_ids=["P1"], caller_names=["add"])
+    assert set(p1_adds) == {"Time", "CallerName"}
+    assert list(p1_adds["Time"]) == [1704067200000, 1704067200000 + 4 * 3600 * 1000]
+
+    late = query_usage_archive(archive_folder, columns=["ProjectID"], start=datetime(2024, 1, 1, 3))
+    assert list(late["ProjectID"]) == ["P2", "P1", "P1"]
+
+    assert len(query_usage_archive(archive_folder, project_ids=["P3"])["Time"]) == 0
+
+    # a single long value is held once, not padded into every row (which would take 80 MB)
+    entries = [UsageLogEntry(Time={"$date": 1704067200000 + i}) for i in range(1000)]
+    entries[0].Errors = ["x" * 20000]
+    tracemalloc.start()
+    arrays = analytics._encode_archive(entries)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 10_000_000
+    assert arrays["Errors_values"][arrays["Errors_codes"][0]] == json.dumps(["x" * 20000])
+
+
+def test_incremental_usage_summariser(tmp_path, record_calls):
+    """_"""
+    lines = [i + "\n" for i in _log_lines(record_calls(projects=("P1", "P2", "P1", "P3", "P2", "P1")))]
+
+    log_file = tmp_path / "Usage_python_toolkit_20240101.log"
+
+    def _append(text):
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def _strip_times(summaries):
+        return sorted((i["ProjectID"], i["TotalNbCals"], i["NbCallingComponents"], i["StartTime"], i["EndTime"]) for i in summaries)
+
+    summariser = IncrementalUsageSummariser(log_file)
+
+    _append("".join(lines[:2]))
+    assert _strip_times(summariser.summarise()) == _strip_times(summarise_usage_logs(UsageLogReader(log_file)))
+
+    # a partially written line is left for the next run
+    _append("".join(lines[2:4]) + lines[4][:20])
+    assert _strip_times(summariser.summarise()) == _strip_times(summarise_usage_logs([UsageLogEntry.from_json(i) for i in lines[:4]]))
+
+    _append(lines[4][20:] + lines[5])
+    assert _strip_times(summariser.summarise()) == _strip_times(summarise_usage_logs(UsageLogReader(log_file)))
+    assert (tmp_path / "Usage_python_toolkit_20240101.log.checkpoint.json").exists()
+
+    # a fresh summariser resumes from the checkpoint, and a replaced log is summarised from the start
+    assert _strip_times(IncrementalUsageSummariser(log_file).summarise()) == _strip_times(summarise_usage_logs(UsageLogReader(log_file)))
+    log_file.write_text("".join(lines[3:]), encoding="utf-8")
+    assert sum(i["TotalNbCals"] for i in IncrementalUsageSummariser(log_file).summarise()) == 3
+
+
+def test_merge_log_shards(tmp_path):
+    """_"""
+    today = f"{datetime.now():%Y%m%d}"
+    (tmp_path / "Usage_python_toolkit_20240101.log").write_text('{"a": 0}\n', encoding="utf-8")
+    (tmp_path / "Usage_python_toolkit_20240101_host_1.log").write_text('{"a": 1}\n{"a": 2}\n', encoding="utf-8-sig")
+    (tmp_path / "Usage_python_toolkit_20240101_host_22.log").write_text('{"a": 3}', encoding="utf-8")
+    (tmp_path / f"Usage_python_toolkit_{today}_host_1.log").write_text('{"a": 4}\n', encoding="utf-8")
+
+    merged = merge_log_shards(tmp_path)
+
+    assert [i.name for i in merged] == ["Usage_python_toolkit_20240101.log"]
+    assert [json.loads(i)["a"] for i in merged[0].read_text(encoding="utf-8").splitlines()] == [0, 1, 2, 3]
+    assert sorted(i.name for i in tmp_path.iterdir()) == sorted(
+        ["Usage_python_toolkit_20240101.log", f"Usage_python_toolkit_{today}_host_1.log"]
+    )
+
+
+def test_appending_rotating_file_handler(tmp_path):
+    """_"""
+    handler = AppendingRotatingFileHandler(str(tmp_path / "usage.log"), maxBytes=100, backupCount=1, delay=True)
+    logger = _logger("test_appending_handler", handler)
+
+    logger.info("a" * 60)
+    logger.info("b" * 60)
+    handler.close()
+
+    assert (tmp_path / "usage.log").read_text() == "b" * 60 + "\n"
+    assert (tmp_path / "usage.log.1").read_text() == "a" * 60 + "\n"
+
+
+
+@pytest.mark.parametrize("compression, suffix", [("gzip", ".gz"), ("lzma", ".xz")])
+def test_compressed_log_rotation(tmp_path, record_calls, compression, suffix):
+    """_"""
+    entries = record_calls(40)
+    lines = _log_lines(entries)
+
+    log_file = tmp_path / "Usage_a_20240101.log"
+    handler = AppendingRotatingFileHandler(str(log_file), maxBytes=len(lines[0]) * 5, backupCount=3, delay=True, compression=compression)
+    logger = _logger(f"test_compressed_rotation_{compression}", handler)
+    for i in range(0, 40, 4):
+        logger.info("\n".join(lines[i:i + 4]))
+    handler.close()
+
+    backups = sorted(tmp_path.glob(f"Usage_a_20240101.log.*{suffix}"))
+    assert [i.name for i in backups] == [f"Usage_a_20240101.log.{i}{suffix}" for i in (1, 2, 3)]
+
+    # the backups and the current log are read in the order they were written
+    read = list(UsageLogReader(tmp_path))
+    assert [i.BHoM_Guid for i in read] == [str(i["BHoM_Guid"]) for i in entries[-len(read):]]
+    assert len(read) == 16
+
+    summariser = IncrementalUsageSummariser(tmp_path)
+    assert [i["TotalNbCals"] for i in summariser.summarise()] == [16]
+    assert [i["TotalNbCals"] for i in summariser.summarise()] == [16]
+
+    with pytest.raises(ValueError):
+        AppendingRotatingFileHandler(str(log_file), compression="zip")
+
+
+def test_bhom_analytics_timing(captured):
+    """_"""
+
+    @bhom_analytics(trace_memory=True)
+    def allocate(n: int) -> int:
+        return len(bytearray(n))
+
+    allocate(10_000_000)
+    custom_data = captured[0]["CustomData"]
+    assert custom_data["WallTimeNs"] > 0
+    assert custom_data["CpuTimeNs"] >= 0
+    assert custom_data["PeakMemoryBytes"] >= 10_000_000
+
+    entries = []
+    for i, duration in enumerate([1_000_000] * 90 + [50_000_000] * 9 + [200_000_000]):
+        entry = dict(captured[0], Time={"$date": i}, CustomData={"WallTimeNs": duration})
+        entries.append(UsageLogEntry.from_json(_log_lines([entry])[0]))
+    summary = summarise_usage_logs(entries)[0]
+
+    assert summary["DurationP50"] == pytest.approx(1, rel=0.05)
+    assert summary["DurationP95"] == pytest.approx(50, rel=0.05)
+    assert summary["DurationMax"] == 200
+
+    # durations per CallerName combine the summaries of every file calling it
+    for i, entry in enumerate(entries):
+        entry.FileId = f"file_{i % 3}"
+    assert len(summarise_usage_logs(entries)) == 3
+    durations = summarise_durations(entries)
+    assert [(i["CallerName"], i["TotalNbCals"]) for i in durations] == [("allocate", 100)]
+    assert durations[0]["DurationP50"] == pytest.approx(1, rel=0.05)
+    assert durations[0]["DurationP95"] == pytest.approx(50, rel=0.05)
+    assert durations[0]["DurationMax"] == 200
+
+
+def test_tracing(tmp_path, captured):
+    """_"""
+
+    @bhom_analytics()
+    def child(a: float) -> float:
+        return a
+
+    @bhom_analytics()
+    def parent(a: float) -> float:
+        return child(a) + child(a)
+
+    tracing.enable()
+    try:
+        parent(1)
+    finally:
+        tracing.disable()
+
+    parent_entry = next(i for i in captured if i["CallerName"] == "parent")
+    child_entries = [i for i in captured if i["CallerName"] == "child"]
+    assert "ParentSpanId" not in parent_entry["CustomData"]
+    assert all(i["CustomData"]["ParentSpanId"] == parent_entry["BHoM_Guid"] for i in child_entries)
+
+    events = json.loads(tracing.export_chrome_trace(tmp_path / "trace.json").read_text())["traceEvents"]
+    tracing.TRACER.clear()
+    assert [i["name"] for i in events] == ["child", "child", "parent"]
+    assert all(i["ph"] == "X" and i["args"]["ParentSpanId"] == str(parent_entry["BHoM_Guid"]) for i in events[:2])
+
+    entries = [UsageLogEntry.from_json(i) for i in _log_lines(captured)]
+    events = json.loads(tracing.export_chrome_trace(tmp_path / "trace.json", entries).read_text())["traceEvents"]
+    assert len(events) == 3
+
+
+def test_bhom_analytics_generators_and_coroutines(captured):
+    """_"""
+
+    @bhom_analytics()
+    def count(n: int):
+        for i in range(n):
+            time.sleep(0.01)
+            yield i
+        return n
+
+    @bhom_analytics()
+    def fail(n: int):
+        yield from range(n)
+        raise ValueError("failed while iterating")
+
+    assert list(count(3)) == [0, 1, 2]
+    assert captured[-1]["CustomData"]["WallTimeNs"] >= 30_000_000
+    assert not captured[-1]["Errors"]
+
+    generator = count(10)
+    next(generator)
+    generator.close()
+    assert len(captured) == 2 and not captured[-1]["Errors"]
+
+    with pytest.raises(ValueError):
+        list(fail(2))
+    assert "failed while iterating" in captured[-1]["Errors"][0]["Message"]
+
+    @bhom_analytics()
+    async def wait(seconds: float) -> float:
+        await asyncio.sleep(seconds)
+        return seconds
+
+    @bhom_analytics()
+    async def stream(n: int):
+        for i in range(n):
+            await asyncio.sleep(0.01)
+            yield i
+
+    async def consume():
+        return [i async for i in stream(3)]
+
+    assert asyncio.run(wait(0.03)) == 0.03
+    assert captured[-1]["CallerName"] == "wait"
+    assert captured[-1]["CustomData"]["WallTimeNs"] >= 30_000_000
+
+    assert asyncio.run(consume()) == [0, 1, 2]
+    assert captured[-1]["CallerName"] == "stream"
+    assert captured[-1]["CustomData"]["WallTimeNs"] >= 30_000_000
+
+
+def test_bson_unix_ticks_array():
+    """_"""
+    date_times = [datetime(2024, 1, 2, 3, 4, 5, 678901), datetime(1999, 12, 31, 23, 59, 59)]
+
+    for short in (True, False):
+        ticks = bson_unix_ticks_array(date_times, short=short)
+        assert ticks.dtype == np.int64
+        assert ticks.tolist() == [bson_unix_ticks(i, short=short) for i in date_times]
+        assert (bson_unix_ticks_array(pd.DatetimeIndex(date_times), short=short) == ticks).all()
+        assert (bson_unix_ticks_array(np.array(date_times, dtype="datetime64[us]"), short=short) == ticks).all()
+
+    ticks = bson_unix_ticks_array(date_times, short=True)
+    assert bson_unix_ticks_to_datetime_array(ticks, short=True).astype(object).tolist() == [
+        bson_unix_ticks_to_datetime(i, short=True) for i in ticks.tolist()
+    ]
+    assert (bson_unix_ticks_to_datetime_array(bson_unix_ticks_array(date_times)) == np.array(date_times, dtype="datetime64[us]")).all()
+
+    aware = pd.DatetimeIndex(date_times).tz_localize("UTC").tz_convert("America/New_York")
+    assert (bson_unix_ticks_array(aware, short=True) == ticks).all()
+    assert abs(bson_unix_ticks(short=True) - bson_unix_ticks(datetime.utcnow(), short=True)) < 1000
+
+
+def test_profiling(tmp_path, captured):
+    """_"""
+
+    @bhom_analytics()
+    def inner(n: int) -> int:
+        return sum(range(n))
+
+    @bhom_analytics()
+    def outer(n: int) -> int:
+        return inner(n) + inner(n)
+
+    profiling.enable(functions=["outer"], output_folder=tmp_path / "function")
+    try:
+        for _ in range(3):
+            outer(1000)
+        inner(1000)
+    finally:
+        written = profiling.disable()
+    assert [i.name for i in written] == [f"outer_{os.getpid()}.prof"]
+    assert len(captured) == 10
+    stats = pstats.Stats(str(written[0]))
+    assert any(name == "inner" and calls == 6 for (_, _, name), (calls, *_) in stats.stats.items())
+
+    profiling.enable(mode="call", output_folder=tmp_path / "call", max_bytes=1)
+    try:
+        outer(10)
+        outer(10)
+    finally:
+        profiling.disable()
+    assert len(list((tmp_path / "call").glob("outer_*.prof"))) == 1
+    assert profiling.PROFILER.discarded == 1
@@ -0,0 +1,210 @@
+﻿import numpy as np
+import pandas as pd
+import pytest
+from python_toolkit.helpers import cardinality
+from python_toolkit.helpers.decay_rate import DecayMethod, DecayRateSmoother, decay_field, decay_rate_smoother, proximity_decay, transition_mask
+from python_toolkit.helpers.helpers import decay_rate_smoother as helpers_decay_rate_smoother
+from python_toolkit.helpers.timeseries import timeseries_summary, timeseries_summary_monthly
+from python_toolkit.helpers.cardinality import CARDINAL_DIRECTIONS, angle_from_cardinal, angle_from_north, angle_to_vector
+
+
+def test_cardinality():
+    """_"""
+    assert cardinality(0) == "N"
+    assert cardinality(359, directions=4) == "N"
+    assert cardinality(100, directions=8) == "E"
+
+    angles = np.linspace(0, 360, 1441)
+    for directions in CARDINAL_DIRECTIONS:
+        binned = cardinality(angles, directions=directions)
+        assert isinstance(binned, pd.Categorical)
+        assert list(binned.categories) == list(CARDINAL_DIRECTIONS[directions])
+        assert list(binned) == [cardinality(i, directions=directions) for i in angles]
+
+    series = pd.Series([10.0, np.nan, 200.0], index=pd.date_range("2024-01-01", periods=3, freq="h"), name="wd")
+    binned = cardinality(series)
+    assert binned.index.equals(series.index) and binned.name == "wd"
+    assert binned.dtype == "category"
+    assert binned.iloc[0] == "N" and pd.isna(binned.iloc[1]) and binned.iloc[2] == "SSW"
+
+    with pytest.raises(ValueError):
+        cardinality(np.array([10, 361]))
+    with pytest.raises(ValueError):
+        cardinality(-1)
+    with pytest.raises(ValueError):
+        cardinality(np.array([10]), directions=12)
+
+
+def test_angle_conversions():
+    """_"""
+    assert angle_from_cardinal("E") == 90
+    with pytest.raises(ValueError):
+        angle_from_cardinal("X")
+
+    labels = np.array(CARDINAL_DIRECTIONS[32] * 3)
+    np.testing.assert_array_equal(angle_from_cardinal(labels), [angle_from_cardinal(i) for i in labels])
+    series = pd.Series(cardinality(pd.Series([0.0, 95.0, 270.0], index=[3, 4, 5])), name="wd")
+    converted = angle_from_cardinal(series)
+    assert converted.index.equals(series.index) and converted.name == "wd"
+    assert converted.tolist() == [0, 90, 270]
+    with pytest.raises(ValueError):
+        angle_from_cardinal(["N", "X"])
+
+    angles = np.linspace(0, 359, 360)
+    vectors = angle_to_vector(angles)
+    assert vectors.shape == (360, 2)
+    np.testing.assert_allclose(vectors, [angle_to_vector(i) for i in angles], atol=1e-12)
+    assert angle_to_vector(90) == pytest.approx((1, 0))
+
+    np.testing.assert_allclose(angle_from_north(vectors), angles, atol=1e-9)
+    np.testing.assert_allclose(angle_from_north(vectors), [angle_from_north(list(i)) for i in vectors])
+    assert angle_from_north([1, 0]) == pytest.approx(90)
+
+
+def test_proximity_decay():
+    """_"""
+    assert proximity_decay(10, 5, 20) == pytest.approx(7.5)
+    assert proximity_decay(10, 5, 20, DecayMethod.PARABOLIC) == pytest.approx(10 * (1 - 0.25**2))
+    assert proximity_decay(10, 25, 20, DecayMethod.SIGMOID) == pytest.approx(0)
+    with pytest.raises(ValueError):
+        proximity_decay(10, 5, 20, "LINEAR")
+
+    x, y = np.meshgrid(np.linspace(-50, 50, 101), np.linspace(-50, 50, 101))
+    distances = np.hypot(x, y)
+    for method in DecayMethod:
+        decayed = proximity_decay(2.0, distances, 40, method)
+        assert decayed.shape == distances.shape
+        np.testing.assert_allclose(decayed.ravel()[::97], [proximity_decay(2.0, i, 40, method) for i in distances.ravel()[::97]])
+        assert (decayed[distances >= 40] == pytest.approx(0)) and decayed[50, 50] == pytest.approx(2.0)
+
+    # values, distances and maximum distances broadcast against each other
+    decayed = proximity_decay(np.array([[1.0], [2.0]]), np.array([0.0, 5.0, 10.0]), np.array([10.0, 10.0, 20.0]))
+    np.testing.assert_allclose(decayed, [[1.0, 0.5, 0.5], [2.0, 1.0, 1.0]])
+
+
+def test_decay_field():
+    """_"""
+    rng = np.random.default_rng(0)
+    sources = rng.uniform(-100, 100, (200, 2))
+    values = rng.uniform(0, 5, 200)
+    max_distance = rng.uniform(5, 30, 200)
+    x, y = np.meshgrid(np.linspace(-120, 120, 61), np.linspace(-120, 120, 41))
+    grid_xy = np.stack([x, y], axis=-1)
+
+    for method in DecayMethod:
+        field = decay_field(sources, values, grid_xy, max_distance, method, chunk_size=500)
+        assert field.shape == (41, 61)
+
+        # brute force, decaying every source at every grid point
+        distances = np.hypot(*(grid_xy.reshape(-1, 1, 2) - sources).transpose(2, 0, 1))
+        expected = proximity_decay(values, distances, max_distance, method).sum(axis=1)
+        np.testing.assert_allclose(field.ravel(), expected, atol=1e-9)
+
+    assert decay_field(np.empty((0, 2)), 1, grid_xy, 10).shape == (41, 61)
+    with pytest.raises(ValueError):
+        decay_field(sources, values, grid_xy, 0)
+    for malformed in [np.zeros((10, 3)), np.zeros(4), np.zeros((2, 2, 2))]:
+        with pytest.raises(ValueError):
+            decay_field(malformed, 1, grid_xy, 10)
+    with pytest.raises(ValueError):
+        decay_field(sources, values, np.zeros((5, 3)), 10)
+
+
+def _looped_decay_rate_smoother(series, difference_threshold=-10, transition_window=4, ewm_span=1.25):
+    """The original implementation, building the mask with a loop."""
+    ewm_mask = []
+    n = 0
+    for i in series.diff() < difference_threshold:
+        if i:
+            n = 0
+        ewm_mask.append(n < transition_window)
+        n += 1
+    return series.ewm(span=ewm_span).mean().where(ewm_mask, series)
+
+
+def test_decay_rate_smoother():
+    """_"""
+    transitions = np.array([False, False, False, True, False, False, False, False, True, False])
+    assert transition_mask(transitions, 2).tolist() == [True, True, False, True, True, False, False, False, True, True]
+    assert transition_mask(np.stack([transitions, ~transitions], axis=1), 1)[:, 1].tolist() == (~transitions).tolist()
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(0, 8, (2000, 3)).cumsum(axis=0), index=pd.date_range("2024-01-01", periods=2000, freq="min"), columns=list("abc"))
+    df.iloc[10:15, 1] = np.nan
+
+    for smoother in [decay_rate_smoother, helpers_decay_rate_smoother]:
+        for transition_window in [0, 1, 4, 30]:
+            pd.testing.assert_series_equal(
+                smoother(df["a"], transition_window=transition_window),
+                _looped_decay_rate_smoother(df["a"], transition_window=transition_window),
+            )
+
+        smoothed = smoother(df, difference_threshold=-5)
+        assert smoothed.columns.equals(df.columns) and smoothed.index.equals(df.index)
+        for column in df:
+            pd.testing.assert_series_equal(smoothed[column], _looped_decay_rate_smoother(df[column], difference_threshold=-5))
+
+
+def test_decay_rate_smoother_streaming():
+    """_"""
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(0, 8, (3000, 2)).cumsum(axis=0), index=pd.date_range("2024-01-01", periods=3000, freq="min"), columns=["a", "b"])
+    df.iloc[:3, 0] = np.nan
+    df.iloc[100:120, 1] = np.nan
+    bounds = [0, 1, 5, 5, 400, 401, 1500, 2999, 3000]
+
+    for ewm_span in [1, 1.25, 6]:
+        smoother = DecayRateSmoother(difference_threshold=-5, transition_window=6, ewm_span=ewm_span)
+        streamed = pd.concat([smoother.update(df.iloc[i:j]) for i, j in zip(bounds, bounds[1:])])
+        pd.testing.assert_frame_equal(streamed, decay_rate_smoother(df, -5, 6, ewm_span), check_freq=False)
+
+        smoother = DecayRateSmoother(difference_threshold=-5, transition_window=6, ewm_span=ewm_span)
+        streamed = pd.concat([smoother.update(df["b"].iloc[i:j]) for i, j in zip(bounds, bounds[1:])])
+        pd.testing.assert_series_equal(streamed, decay_rate_smoother(df["b"], -5, 6, ewm_span), check_freq=False)
+
+    with pytest.raises(ValueError):
+        smoother.update(df)
+    smoother.reset()
+    assert smoother.update(df).shape == df.shape
+
+
+def test_timeseries_summary():
+    """_"""
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(rng.uniform(0, 30, (9000, 3)), index=pd.date_range("2023-11-01", periods=9000, freq="h"), columns=["a", "b", "c"])
+    df.iloc[0] = 0
+    df.iloc[1] = 30
+    df.iloc[2] = 10
+    bins = [0, 10, 20, 30]
+
+    for bin_names in [None, ["low", "mid", "high"]]:
+        for period, keys in [("month", df.index.month), ("hour", df.index.hour), ("day_of_week", df.index.day_of_week)]:
+            # the counts as grouping the binned values would give them
+            binned = pd.cut(df["a"], bins=bins, labels=bin_names, include_lowest=True)
+            expected = binned.groupby(keys).value_counts().unstack().sort_index(axis=0)
+            expected.columns.name = None
+
+            summary = timeseries_summary(df["a"], bins, bin_names, period=period)
+            pd.testing.assert_frame_equal(summary, expected, check_names=False)
+            assert summary.index.name == "".join(i.title() for i in period.split("_"))
+
+        pd.testing.assert_frame_equal(
+            timeseries_summary_monthly(df["b"], bins, bin_names, density=True),
+            timeseries_summary(df["b"], bins, bin_names).pipe(lambda x: x.div(x.sum(axis=1), axis=0)),
+        )
+
+    # every column of a DataFrame is summarised at once
+    summary = timeseries_summary_monthly(df, bins)
+    assert list(summary.columns.get_level_values(0).unique()) == ["a", "b", "c"]
+    for column in df:
+        pd.testing.assert_frame_equal(summary[column], timeseries_summary_monthly(df[column], bins), check_names=False)
+
+    seasons = timeseries_summary(df["c"], bins, period="season")
+    assert list(seasons.index) == ["DJF", "MAM", "JJA", "SON"] and seasons.values.sum() == len(df)
+    assert timeseries_summary(df["c"], bins, period=df.index.year).index.tolist() == [2023, 2024]
+
+    with pytest.raises(ValueError):
+        timeseries_summary_monthly(df["a"] + 1, bins)
+    with pytest.raises(ValueError):
+        timeseries_summary(df["a"], bins, period="fortnight")
+    with pytest.raises(ValueError):
+        timeseries_summary_monthly(df["a"].reset_index(drop=True), bins)
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIRECTORY = Path(__file__).parent.parent / "src"
+
+
+def _imported_modules(statement: str) -> dict:
+    """Run an import in a fresh interpreter with -X importtime, returning the cumulative import
+    time in microseconds of each module imported."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(SRC_DIRECTORY), os.environ.get("PYTHONPATH", "")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+@pytest.mark.parametrize(
+    "statement, heavy_modules",
+    [
+        ("import python_toolkit", ["matplotlib", "numpy", "pandas", "plotly", "importlib.metadata"]),
+        ("import python_toolkit.bhom.analytics", ["matplotlib", "numpy", "pandas", "importlib.metadata", "concurrent.futures.process"]),
+        ("from python_toolkit.helpers import cardinality", ["matplotlib", "pandas", "caseconverter"]),
+        ("import python_toolkit.plot.heatmap", ["plotly", "caseconverter"]),
+    ],
+)
+def test_lazy_imports(statement, heavy_modules):
+    """Check that imports do not pull in heavy dependencies they do not need."""
+    modules = _imported_modules(statement)
+    assert modules, "-X importtime produced no output"
+    assert not [i for i in heavy_modules if i in modules]
+
+
+def test_lazy_attributes():
+    """Check that lazily imported attributes are still available."""
+    import python_toolkit  # pylint: disable=import-outside-toplevel
+    import python_toolkit.plot.heatmap  # pylint: disable=import-outside-toplevel
+    from python_toolkit import bhom, helpers  # pylint: disable=import-outside-toplevel
+    from python_toolkit.helpers import cardinality, timeseries_summary_monthly  # pylint: disable=import-outside-toplevel
+
+    assert callable(cardinality) and callable(timeseries_summary_monthly)
+    assert isinstance(bhom.BHOM_VERSION, str) and bhom.BHOM_VERSION == bhom.get_bhom_version()
+    assert python_toolkit.plot.heatmap.heatmap is not None
+    assert "timeseries_summary_monthly" in dir(helpers)
+    assert "plot" in dir(python_toolkit)
+    with pytest.raises(AttributeError):
+        _ = helpers.not_a_helper
+
+    # star imports include the lazily imported names
+    namespace = {}
+    exec("from python_toolkit.helpers import *", namespace)  # pylint: disable=exec-used
+    assert set(helpers.__all__) <= set(namespace) and callable(namespace["decay_rate_smoother"])
@@ -4,6 +4,7 @@ import pandas as pd
 import pytest
 from python_toolkit.plot.diurnal import diurnal, stacked_diurnals
 from python_toolkit.plot.heatmap import heatmap
+from python_toolkit.plot.histogram import monthly_proportional_histogram
 from python_toolkit.plot.spatial_heatmap import spatial_heatmap
 from python_toolkit.plot.utilities import (
     colormap_sequential,
@@ -160,4 +161,10 @@ def test_heatmap():
         ),
         plt.Axes,
     )
-    plt.close("all")
\ No newline at end of file
+    plt.close("all")
+
+def test_monthly_proportional_histogram():
+    """_"""
+    bins = [TIMESERIES_COLLECTION.min(), TIMESERIES_COLLECTION.quantile(0.5), TIMESERIES_COLLECTION.max()]
+    assert isinstance(monthly_proportional_histogram(TIMESERIES_COLLECTION, bins, labels=["low", "high"], show_labels=True, show_legend=True), plt.Axes)
+    plt.close("all")